@@ -0,0 +1,2 @@
+# livekit-agent/load_test.py is a command-line load generator that only shares pytest's file name pattern.
+collect_ignore = ["livekit-agent/load_test.py"]
@@ -20,10 +20,14 @@
     'assets': {
         'web.assets_backend': [
             'odoo_voice_agent/static/src/js/voice_widget.js',
-            'odoo_voice_agent/static/src/js/navigation_handler.js',
             'odoo_voice_agent/static/src/css/voice_widget.css',
             'odoo_voice_agent/static/src/xml/voice_widget_templates.xml',
         ],
+        # Loaded by the systray button on first hover or click
+        'odoo_voice_agent.assets_voice': [
+            'odoo_voice_agent/static/src/js/navigation_handler.js',
+            'odoo_voice_agent/static/src/js/voice_session.js',
+        ],
     },
     'installable': True,
     'application': False,
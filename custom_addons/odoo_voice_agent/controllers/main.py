@@ -1,9 +1,16 @@
+import datetime
+import functools
+import hashlib
+import hmac
 import json
 import logging
+import math
+import re
 import time
 import os
 from odoo import http
 from odoo.http import request
+from odoo.tools import config, ormcache
 
 _logger = logging.getLogger(__name__)
 
@@ -13,72 +20,330 @@ except ImportError:
     _logger.warning("LiveKit SDK not installed. Install with: pip install livekit")
     api = None
 
+try:
+    import redis
+except ImportError:
+    _logger.warning("Redis client not installed, LiveKit tokens will not be cached")
+    redis = None
+
+# Lifetime of issued LiveKit tokens, and how long before expiry they are re-minted
+TOKEN_TTL = int(os.getenv('VOICE_AGENT_TOKEN_TTL', 3600))
+TOKEN_REFRESH_MARGIN = int(os.getenv('VOICE_AGENT_TOKEN_REFRESH_MARGIN', 300))
+TOKEN_STABLE_ROOM = os.getenv('VOICE_AGENT_STABLE_ROOM', 'false').lower() == 'true'
+# Without stable rooms, how long a user's timestamped room and its token are reused before a new room is made
+TOKEN_ROOM_REUSE = int(os.getenv('VOICE_AGENT_ROOM_REUSE', 300))
+
+# Token buckets as (sustained requests per second, burst), per user and shared by all users
+RATE_LIMIT_USER = (
+    float(os.getenv('VOICE_AGENT_RATE_USER', 0.5)),
+    int(os.getenv('VOICE_AGENT_BURST_USER', 5)),
+)
+RATE_LIMIT_GLOBAL = (
+    float(os.getenv('VOICE_AGENT_RATE_GLOBAL', 10)),
+    int(os.getenv('VOICE_AGENT_BURST_GLOBAL', 30)),
+)
+RATE_LIMIT_STATS_KEY = 'voice_agent:ratelimit:stats'
+
+# LiveKit client builds fetched at image build time (see Dockerfile.odoo), one directory per version
+LIVEKIT_CLIENT_PATH = 'odoo_voice_agent/static/lib/livekit-client/{version}/livekit-client.umd.min.js'
+_LIVEKIT_CLIENT_VERSION = re.compile(r'\d+\.\d+\.\d+')
+
+# Checks the user and global buckets (KEYS[1], KEYS[2]) atomically and only
+# consumes a token from both when both have one. Returns the seconds to wait,
+# "0" when the request is admitted, and counts the outcome in KEYS[3].
+_TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local levels = {}
+local retry_after = 0
+for i = 1, 2 do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        retry_after = math.max(retry_after, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+for i = 1, 2 do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    if retry_after == 0 then
+        levels[i] = levels[i] - 1
+    end
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(burst / rate) + 1)
+end
+local outcome = retry_after == 0 and 'allowed' or 'rejected'
+redis.call('HINCRBY', KEYS[3], ARGV[5] .. ':' .. outcome, 1)
+return tostring(retry_after)
+"""
+
+_redis_client = None
+_token_bucket = None
+
+
+def _get_redis():
+    """Return the shared client for the Redis instance used by the session store"""
+    global _redis_client
+    if redis is None:
+        return None
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=config.get('session_redis_host') or os.getenv('REDIS_HOST', 'localhost'),
+            port=int(config.get('session_redis_port') or os.getenv('REDIS_PORT', 6379)),
+            password=config.get('session_redis_password') or os.getenv('REDIS_PASSWORD') or None,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _redis_client
+
+
+def _admit(route, uid):
+    """Take a token from the user and global buckets of ``route``.
+
+    Returns ``0`` when the request may proceed, otherwise the number of
+    seconds to wait. Admission fails open when Redis is unavailable.
+    """
+    global _token_bucket
+    client = _get_redis()
+    if client is None:
+        return 0
+    if _token_bucket is None:
+        _token_bucket = client.register_script(_TOKEN_BUCKET_SCRIPT)
+    try:
+        retry_after = _token_bucket(
+            keys=[
+                f"voice_agent:ratelimit:{route}:user:{request.db}:{uid}",
+                f"voice_agent:ratelimit:{route}:global",
+                RATE_LIMIT_STATS_KEY,
+            ],
+            args=[*RATE_LIMIT_USER, *RATE_LIMIT_GLOBAL, route],
+        )
+    except redis.RedisError as e:
+        _logger.warning(f"Voice agent rate limiter unavailable: {str(e)}")
+        return 0
+    return float(retry_after)
+
+
+def rate_limited(route):
+    """Reject calls to a voice agent JSON route once its token buckets run dry"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            retry_after = _admit(route, request.env.uid)
+            if retry_after:
+                retry_after = math.ceil(retry_after)
+                request.future_response.headers['Retry-After'] = str(retry_after)
+                return {
+                    'error': f"Voice assistant is busy, retry in {retry_after}s",
+                    'retry_after': retry_after,
+                }
+            return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@ormcache('group_ids', 'lang', 'debug')
+def _cached_root_menus(menu_model, group_ids, lang, debug):
+    """Return ``(modules, version)`` describing the root menus of a group set.
+
+    ``debug`` is part of the key because menus restricted to
+    ``base.group_no_one`` are only visible in debug mode.
+
+    Roots are filtered in SQL, and the xml_ids and menu fields of all roots
+    are fetched in one batch each. The result lives in the registry's default
+    cache, which ``ir.ui.menu`` clears whenever a menu changes.
+    """
+    menus = menu_model.search([('parent_id', '=', False)])
+    xml_ids = menus.get_external_id()
+    modules = tuple(
+        {
+            'id': menu['id'],
+            'name': menu['name'],
+            'xml_id': xml_ids.get(menu['id'], ''),
+            # Reference fields read as 'model,id'
+            'action': int(menu['action'].split(',')[1]) if menu['action'] else None,
+            'web_icon': menu['web_icon'],
+        }
+        for menu in menus.read(['name', 'action', 'web_icon'])
+    )
+    version = hashlib.sha256(json.dumps(modules, sort_keys=True).encode()).hexdigest()[:20]
+    return modules, version
+
 
 class VoiceAgentController(http.Controller):
 
+    def _mint_token(self, user):
+        """Sign a LiveKit access token for ``user``"""
+        # Get LiveKit credentials from environment variables (Railway)
+        livekit_url = os.getenv('LIVEKIT_URL', 'wss://live-agent-9pacbr1x.livekit.cloud')
+        livekit_api_key = os.getenv('LIVEKIT_API_KEY', 'APIGXGkGsm32tQF')
+        livekit_api_secret = os.getenv('LIVEKIT_API_SECRET', 'RfZNRb5sugVMuTFR47jC87Ts2LfxDT9HVioZVned8YVA')
+
+        # Stable rooms let reconnects land on the room whose agent is already warm
+        if TOKEN_STABLE_ROOM:
+            room_name = f"odoo_voice_{user.id}"
+        else:
+            room_name = f"odoo_voice_{user.id}_{int(time.time())}"
+        participant_name = user.name or f"User{user.id}"
+
+        # Create access token
+        token = api.AccessToken(livekit_api_key, livekit_api_secret)
+        token.with_identity(participant_name).with_name(participant_name).with_ttl(
+            datetime.timedelta(seconds=TOKEN_TTL)
+        ).with_grants(
+            api.VideoGrants(
+                room_join=True,
+                room=room_name,
+                can_publish=True,
+                can_subscribe=True,
+            )
+        )
+
+        return {
+            'token': token.to_jwt(),
+            'url': livekit_url,
+            'room': room_name,
+            'participant': participant_name,
+            'expires_at': int(time.time()) + TOKEN_TTL,
+        }
+
+    def _get_token_payload(self):
+        """Return a LiveKit token for the current user, reusing the cached one if still fresh
+
+        A cached token pins its room for the whole entry lifetime. Stable
+        per-user rooms keep it until shortly before the token expires; the
+        default timestamped rooms only for ``TOKEN_ROOM_REUSE`` seconds, so
+        reconnects within that window share a room and later connections
+        still get a new one. A reuse window of 0 disables the cache for them.
+        """
+        user = request.env.user
+        key = f"voice_agent:token:{request.db}:{user.id}"
+        lifetime = max(TOKEN_TTL - TOKEN_REFRESH_MARGIN, 1)
+        if not TOKEN_STABLE_ROOM:
+            lifetime = min(lifetime, TOKEN_ROOM_REUSE)
+        client = _get_redis() if lifetime > 0 else None
+        if client is not None:
+            try:
+                cached = client.get(key)
+                if cached:
+                    return json.loads(cached)
+            except redis.RedisError as e:
+                _logger.warning(f"Voice agent token cache unavailable: {str(e)}")
+                client = None
+
+        payload = self._mint_token(user)
+        if client is not None:
+            try:
+                # Expire the entry early so clients never receive a token about to lapse
+                client.set(key, json.dumps(payload), ex=lifetime)
+            except redis.RedisError as e:
+                _logger.warning(f"Voice agent token cache unavailable: {str(e)}")
+        return payload
+
     @http.route('/voice_agent/get_token', type='json', auth='user')
+    @rate_limited('get_token')
     def get_livekit_token(self, **kwargs):
         """Generate LiveKit access token for the current user"""
         if not api:
             return {'error': 'LiveKit SDK not installed'}
 
         try:
-            # Get LiveKit credentials from environment variables (Railway)
-            livekit_url = os.getenv('LIVEKIT_URL', 'wss://live-agent-9pacbr1x.livekit.cloud')
-            livekit_api_key = os.getenv('LIVEKIT_API_KEY', 'APIGXGkGsm32tQF')
-            livekit_api_secret = os.getenv('LIVEKIT_API_SECRET', 'RfZNRb5sugVMuTFR47jC87Ts2LfxDT9HVioZVned8YVA')
-
-            # Generate unique room name for this user
-            user = request.env.user
-            room_name = f"odoo_voice_{user.id}_{int(time.time())}"
-            participant_name = user.name or f"User{user.id}"
-
-            # Create access token
-            token = api.AccessToken(livekit_api_key, livekit_api_secret)
-            token.with_identity(participant_name).with_name(participant_name).with_grants(
-                api.VideoGrants(
-                    room_join=True,
-                    room=room_name,
-                    can_publish=True,
-                    can_subscribe=True,
-                )
-            )
-
-            jwt_token = token.to_jwt()
-
-            return {
-                'token': jwt_token,
-                'url': livekit_url,
-                'room': room_name,
-                'participant': participant_name,
-            }
+            return self._get_token_payload()
 
         except Exception as e:
             _logger.error(f"Error generating LiveKit token: {str(e)}")
             return {'error': str(e)}
 
+    def _get_modules_payload(self):
+        """Return ``(modules, version)`` for the root menus visible to the current user"""
+        env = request.env
+        return _cached_root_menus(
+            env['ir.ui.menu'], frozenset(env.user.groups_id.ids), env.lang, bool(request.session.debug),
+        )
+
     @http.route('/voice_agent/get_modules', type='json', auth='user')
-    def get_installed_modules(self, **kwargs):
-        """Return list of installed Odoo modules with their menu IDs"""
+    @rate_limited('get_modules')
+    def get_installed_modules(self, since=None, **kwargs):
+        """Return list of installed Odoo modules with their menu IDs
+
+        Clients that pass the ``version`` they already hold as ``since`` get
+        ``unchanged: True`` instead of the full list when nothing changed.
+        """
         try:
-            # Get all menu items accessible to current user
-            menus = request.env['ir.ui.menu'].search([])
+            modules, version = self._get_modules_payload()
+            if since and since == version:
+                return {'version': version, 'unchanged': True}
+            return {'version': version, 'modules': list(modules)}
 
-            modules_list = []
-            for menu in menus:
-                if menu.parent_id:  # Skip root menus
-                    continue
+        except Exception as e:
+            _logger.error(f"Error fetching modules: {str(e)}")
+            return {'error': str(e)}
 
-                modules_list.append({
-                    'id': menu.id,
-                    'name': menu.name,
-                    'xml_id': menu.get_xml_id().get(menu.id, ''),
-                    'action': menu.action.id if menu.action else None,
-                    'web_icon': menu.web_icon,
-                })
+    @http.route('/voice_agent/bootstrap', type='json', auth='user')
+    @rate_limited('bootstrap')
+    def bootstrap(self, since=None, **kwargs):
+        """Return the LiveKit token, accessible modules and user language in one round trip"""
+        if not api:
+            return {'error': 'LiveKit SDK not installed'}
 
-            return {'modules': modules_list}
+        try:
+            result = dict(self._get_token_payload())
+            modules, version = self._get_modules_payload()
+            result['modules_version'] = version
+            if since != version:
+                result['modules'] = list(modules)
+            result['lang'] = request.env.user.lang or request.env.lang
+            return result
 
         except Exception as e:
-            _logger.error(f"Error fetching modules: {str(e)}")
+            _logger.error(f"Error bootstrapping voice agent: {str(e)}")
             return {'error': str(e)}
+
+    @http.route('/voice_agent/lib/livekit-client/<string:version>/livekit-client.js', type='http', auth='public')
+    def livekit_client(self, version, **kwargs):
+        """Serve the LiveKit client; the version in the URL makes it safe to cache for good"""
+        if not _LIVEKIT_CLIENT_VERSION.fullmatch(version):
+            raise request.not_found()
+        try:
+            stream = http.Stream.from_path(LIVEKIT_CLIENT_PATH.format(version=version))
+        except (FileNotFoundError, ValueError):
+            raise request.not_found()
+        stream.mimetype = 'text/javascript'
+        return stream.get_response(max_age=http.STATIC_CACHE_LONG, immutable=True)
+
+    @http.route('/voice_agent/metrics', type='http', auth='none')
+    def metrics(self, **kwargs):
+        """Expose admission counters in the Prometheus text format
+
+        The route is public, so it stays hidden unless VOICE_AGENT_METRICS_TOKEN
+        is set and the scraper sends it as a bearer token.
+        """
+        metrics_token = os.getenv('VOICE_AGENT_METRICS_TOKEN')
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if not metrics_token or not hmac.compare_digest(authorization, f"Bearer {metrics_token}"):
+            raise request.not_found()
+
+        client = _get_redis()
+        stats = {}
+        if client is not None:
+            try:
+                stats = client.hgetall(RATE_LIMIT_STATS_KEY)
+            except redis.RedisError as e:
+                _logger.warning(f"Voice agent rate limiter unavailable: {str(e)}")
+
+        lines = [
+            '# HELP voice_agent_requests_total Voice agent requests by admission outcome',
+            '# TYPE voice_agent_requests_total counter',
+        ]
+        for field, count in sorted(stats.items()):
+            route, outcome = field.decode().split(':')
+            lines.append(f'voice_agent_requests_total{{route="{route}",outcome="{outcome}"}} {int(count)}')
+        return request.make_response(
+            '\n'.join(lines) + '\n',
+            headers=[('Content-Type', 'text/plain; version=0.0.4')],
+        )
@@ -2,29 +2,74 @@
 
 import { browser } from "@web/core/browser/browser";
 
-// Listen for voice navigation events
-window.addEventListener('voice-navigate', (event) => {
-    const { pathname } = event.detail;
+// Sequence number of the last voice navigation if it was speculative and can still be undone, else null
+let speculativeSeq = null;
 
-    if (pathname) {
-        console.log('Voice navigation to:', pathname);
+// Longest wait for the web client to settle on the new URL before reporting it
+const SETTLE_TIMEOUT = 500;
 
-        // Use Odoo's router to navigate
-        browser.location.hash = pathname;
+// Current location of the page, as reported back to the voice agent
+function currentLocation() {
+    return window.location.pathname + window.location.search + window.location.hash;
+}
 
-        // Alternatively, reload with new hash
-        // window.location.href = window.location.origin + pathname;
+// Run a URL change and resolve with the resulting location once it has settled
+function changeLocation(change) {
+    return new Promise((resolve) => {
+        const settled = () => {
+            window.removeEventListener('hashchange', settled);
+            window.removeEventListener('popstate', settled);
+            clearTimeout(timer);
+            resolve(currentLocation());
+        };
+        const timer = setTimeout(settled, SETTLE_TIMEOUT);
+        window.addEventListener('hashchange', settled);
+        window.addEventListener('popstate', settled);
+        change();
+    });
+}
+
+// Navigate and resolve with the resulting location
+function navigateTo(pathname, speculative = false, seq = null) {
+    console.log('Voice navigation to:', pathname);
+
+    if (window.location.hash === pathname) {
+        // The user is already here; a rollback must not take them off a page they chose
+        speculativeSeq = null;
+        return Promise.resolve(currentLocation());
     }
-});
+    speculativeSeq = speculative ? seq : null;
+    // Use Odoo's router to navigate
+    return changeLocation(() => {
+        browser.location.hash = pathname;
+    });
+}
 
-// Send current location to voice agent (if connected)
-function sendCurrentLocation() {
-    const currentHash = window.location.hash;
+// Go back one page and resolve with the resulting location
+function goBack() {
+    console.log('Voice navigation back');
+    speculativeSeq = null;
+    return changeLocation(() => browser.history.back());
+}
 
-    // This would be called when agent asks "where am I?"
-    // Implementation depends on how we send messages back to agent
-    console.log('Current location:', currentHash);
+// Undo speculative navigation seq by going back to the page it left, unless a later navigation replaced it
+function rollbackNavigation(seq) {
+    if (speculativeSeq !== null && seq === speculativeSeq) {
+        console.log('Voice navigation rolled back:', seq);
+        speculativeSeq = null;
+        browser.history.back();
+    }
 }
 
+// Listen for voice navigation events
+window.addEventListener('voice-navigate', (event) => {
+    const { pathname, speculative, seq } = event.detail;
+    if (pathname) {
+        navigateTo(pathname, speculative, seq);
+    }
+});
+
+window.addEventListener('voice-navigate-rollback', (event) => rollbackNavigation(event.detail && event.detail.seq));
+
 // Export for use in other modules
-export { sendCurrentLocation };
+export { currentLocation, goBack, navigateTo, rollbackNavigation };
@@ -0,0 +1,262 @@
+/** @odoo-module **/
+
+import { loadJS } from "@web/core/assets";
+import { registry } from "@web/core/registry";
+import { currentLocation, goBack, navigateTo, rollbackNavigation } from "@odoo_voice_agent/js/navigation_handler";
+
+// Navigation protocol shared with the agent (see livekit-agent/navigation.py)
+const NAV_TOPIC = "odoo-nav";
+const NAV_PROTOCOL_VERSION = 1;
+// Coalesces the bursts of UI updates a single navigation produces
+const PAGE_STATE_DELAY = 150;
+// LiveKit client served by this addon; keep in step with LIVEKIT_CLIENT_VERSION in Dockerfile.odoo
+const LIVEKIT_CLIENT_VERSION = "2.0.0";
+const LIVEKIT_CLIENT_URL = `/voice_agent/lib/livekit-client/${LIVEKIT_CLIENT_VERSION}/livekit-client.js`;
+// A prepared token this close to expiry is fetched again before connecting
+const TOKEN_EXPIRY_MARGIN = 60;
+
+// Connection to the agent's room, loaded on the first hover or click of the systray button
+export class VoiceSession {
+    constructor(env, { rpc, menuService, actionService, state }) {
+        this.env = env;
+        this.rpc = rpc;
+        this.menuService = menuService;
+        this.actionService = actionService;
+        this.state = state;
+
+        this.room = null;
+        this.bootstrapData = null;
+        this.preparing = null;
+        this.modules = [];
+        this.modulesVersion = null;
+        this.lang = null;
+        this.lastNavigationSeq = 0;
+        this.lastPageState = null;
+        this.lastModulesVersion = null;
+        this.pageStateTimer = null;
+        this.onPageChanged = () => this.schedulePageState();
+
+        this.env.bus.addEventListener("ACTION_MANAGER:UI-UPDATED", this.onPageChanged);
+        this.env.bus.addEventListener("MENUS:APP-CHANGED", this.onPageChanged);
+        window.addEventListener("hashchange", this.onPageChanged);
+    }
+
+    destroy() {
+        this.env.bus.removeEventListener("ACTION_MANAGER:UI-UPDATED", this.onPageChanged);
+        this.env.bus.removeEventListener("MENUS:APP-CHANGED", this.onPageChanged);
+        window.removeEventListener("hashchange", this.onPageChanged);
+        clearTimeout(this.pageStateTimer);
+        this.disconnect();
+    }
+
+    // Load the client, fetch the token and warm up the connection while the user is still reaching for the button
+    prepare() {
+        const expiresAt = this.bootstrapData && this.bootstrapData.expires_at;
+        if (expiresAt && expiresAt - Date.now() / 1000 < TOKEN_EXPIRY_MARGIN) {
+            this.preparing = null;
+        }
+        if (!this.preparing) {
+            this.preparing = this._prepare().catch((error) => {
+                this.preparing = null;
+                throw error;
+            });
+        }
+        return this.preparing;
+    }
+
+    async _prepare() {
+        const prepareStart = performance.now();
+        const [, tokenData] = await Promise.all([
+            loadJS(LIVEKIT_CLIENT_URL),
+            // Token, modules and user context from Odoo in one round trip
+            this.rpc('/voice_agent/bootstrap', { since: this.modulesVersion }),
+        ]);
+        if (tokenData.error) {
+            throw new Error(tokenData.error);
+        }
+        if (tokenData.modules) {
+            this.modules = tokenData.modules;
+        }
+        this.modulesVersion = tokenData.modules_version;
+        this.lang = tokenData.lang;
+        this.bootstrapData = tokenData;
+
+        this.room = this.room || this.createRoom();
+        // Resolves DNS and opens TLS to the LiveKit region before the click
+        await this.room.prepareConnection(tokenData.url, tokenData.token);
+        console.log(`Voice session prepared in ${Math.round(performance.now() - prepareStart)} ms`);
+    }
+
+    createRoom() {
+        const room = new window.LivekitClient.Room({
+            adaptiveStream: true,
+            dynacast: true,
+        });
+
+        room.on('connected', () => {
+            this.state.isConnected = true;
+            this.lastPageState = null;
+            this.lastModulesVersion = null;
+            this.schedulePageState();
+        });
+
+        // The agent joins after us; give it the apps this user can open and the page it starts from
+        room.on('participantConnected', () => {
+            this.lastPageState = null;
+            this.lastModulesVersion = null;
+            this.schedulePageState();
+        });
+
+        room.on('disconnected', () => {
+            console.log('Disconnected from LiveKit');
+            this.state.isConnected = false;
+            this.state.isRecording = false;
+            this.state.isSpeaking = false;
+        });
+
+        room.on('dataReceived', (payload, participant, kind, topic) => {
+            if (topic === NAV_TOPIC) {
+                this.handleNavigationMessage(payload, participant);
+            }
+        });
+        return room;
+    }
+
+    async connect() {
+        const connectStart = performance.now();
+        await this.prepare();
+        const { url, token } = this.bootstrapData;
+        // A token is only good for one connection; the next one is prepared afresh
+        this.bootstrapData = null;
+        this.preparing = null;
+        // Each agent job numbers its navigations from 1
+        this.lastNavigationSeq = 0;
+
+        await this.room.connect(url, token);
+        console.log(`Connected to LiveKit room in ${Math.round(performance.now() - connectStart)} ms`);
+
+        await this.room.localParticipant.setMicrophoneEnabled(true);
+        this.state.isRecording = true;
+    }
+
+    async disconnect() {
+        const room = this.room;
+        this.room = null;
+        this.bootstrapData = null;
+        this.preparing = null;
+        if (room) {
+            await room.disconnect();
+        }
+        this.state.isConnected = false;
+        this.state.isRecording = false;
+        this.state.isSpeaking = false;
+    }
+
+    async handleNavigationMessage(payload, participant) {
+        try {
+            const decoder = new TextDecoder();
+            const [version, kind, seq, ...fields] = JSON.parse(decoder.decode(payload));
+            if (version !== NAV_PROTOCOL_VERSION) {
+                console.warn('Unsupported navigation protocol version:', version);
+                return;
+            }
+
+            if (kind === 'n') {
+                // Retries of an applied navigation are only acknowledged again
+                let location = currentLocation();
+                if (seq > this.lastNavigationSeq) {
+                    this.lastNavigationSeq = seq;
+                    const [pathname, speculative] = fields;
+                    location = await navigateTo(pathname, Boolean(speculative), seq);
+                }
+                await this.sendNavigationAck(seq, location, participant);
+            } else if (kind === 'b') {
+                let location = currentLocation();
+                if (seq > this.lastNavigationSeq) {
+                    this.lastNavigationSeq = seq;
+                    location = await goBack();
+                }
+                await this.sendNavigationAck(seq, location, participant);
+            } else if (kind === 'r') {
+                // The agent navigated early and the user turned out to mean something else
+                rollbackNavigation(seq);
+            }
+        } catch (error) {
+            console.error('Error handling navigation message:', error);
+        }
+    }
+
+    schedulePageState() {
+        clearTimeout(this.pageStateTimer);
+        this.pageStateTimer = setTimeout(() => this.sendPageState(), PAGE_STATE_DELAY);
+    }
+
+    // Tell the agent which apps this user can open, so it only resolves spoken names to menus they can see
+    async sendModules() {
+        if (this.modulesVersion === this.lastModulesVersion) {
+            return;
+        }
+        const menus = this.modules.map((module) => [module.id, module.xml_id || null, module.name]);
+        const serialized = JSON.stringify([NAV_PROTOCOL_VERSION, 'm', this.modulesVersion, menus]);
+        this.lastModulesVersion = this.modulesVersion;
+        try {
+            await this.room.localParticipant.publishData(new TextEncoder().encode(serialized), {
+                reliable: true,
+                topic: NAV_TOPIC,
+            });
+        } catch (error) {
+            this.lastModulesVersion = null;
+            console.error('Error sending modules:', error);
+        }
+    }
+
+    // Tell the agent what the page shows, so it can answer "where am I" and relative commands itself
+    async sendPageState() {
+        if (!this.room || !this.state.isConnected) {
+            return;
+        }
+        await this.sendModules();
+        const app = this.menuService.getCurrentApp();
+        const controller = this.actionService.currentController;
+        const action = controller && controller.action;
+        const pageState = [
+            currentLocation(),
+            app ? app.id : null,
+            app ? app.name : null,
+            app ? app.xmlid : null,
+            action ? action.name || null : null,
+            action ? action.res_model || null : null,
+            controller && controller.view ? controller.view.type : null,
+        ];
+        const serialized = JSON.stringify([NAV_PROTOCOL_VERSION, 's', ...pageState]);
+        if (serialized === this.lastPageState) {
+            return;
+        }
+        this.lastPageState = serialized;
+        try {
+            await this.room.localParticipant.publishData(new TextEncoder().encode(serialized), {
+                reliable: true,
+                topic: NAV_TOPIC,
+            });
+        } catch (error) {
+            console.error('Error sending page state:', error);
+        }
+    }
+
+    async sendNavigationAck(seq, location, participant) {
+        if (!this.room) {
+            return;
+        }
+        const encoder = new TextEncoder();
+        await this.room.localParticipant.publishData(
+            encoder.encode(JSON.stringify([NAV_PROTOCOL_VERSION, 'a', seq, location])),
+            {
+                reliable: true,
+                topic: NAV_TOPIC,
+                destinationIdentities: participant ? [participant.identity] : [],
+            }
+        );
+    }
+}
+
+registry.category("voice_agent").add("session", VoiceSession);
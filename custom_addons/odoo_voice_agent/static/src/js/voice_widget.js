@@ -1,12 +1,18 @@
 /** @odoo-module **/
 
-import { Component, useState, onMounted, onWillUnmount } from "@odoo/owl";
+import { Component, useState, onWillUnmount } from "@odoo/owl";
+import { loadBundle } from "@web/core/assets";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
 
+// The connection code and the LiveKit client load on first intent, not with every backend page
+const VOICE_BUNDLE = "odoo_voice_agent.assets_voice";
+
 export class VoiceWidget extends Component {
     setup() {
         this.rpc = useService("rpc");
+        this.menuService = useService("menu");
+        this.actionService = useService("action");
         this.state = useState({
             isConnected: false,
             isRecording: false,
@@ -14,114 +20,61 @@ export class VoiceWidget extends Component {
             error: null,
         });
 
-        this.room = null;
-        this.localParticipant = null;
-
-        onMounted(() => {
-            this.loadLiveKitSDK();
-        });
+        this.session = null;
+        this.sessionPromise = null;
 
         onWillUnmount(() => {
-            this.disconnect();
+            if (this.session) {
+                this.session.destroy();
+            }
         });
     }
 
-    async loadLiveKitSDK() {
-        // Load LiveKit Client SDK from CDN
-        if (window.LivekitClient) {
-            return;
+    loadSession() {
+        if (!this.sessionPromise) {
+            this.sessionPromise = loadBundle(VOICE_BUNDLE).then(() => {
+                const VoiceSession = registry.category("voice_agent").get("session");
+                this.session = new VoiceSession(this.env, {
+                    rpc: this.rpc,
+                    menuService: this.menuService,
+                    actionService: this.actionService,
+                    state: this.state,
+                });
+                return this.session;
+            }).catch((error) => {
+                this.sessionPromise = null;
+                throw error;
+            });
         }
-
-        const script = document.createElement('script');
-        script.src = 'https://unpkg.com/livekit-client@2.0.0/dist/livekit-client.umd.min.js';
-        script.onload = () => {
-            console.log('LiveKit SDK loaded');
-        };
-        script.onerror = () => {
-            this.state.error = 'Failed to load LiveKit SDK';
-        };
-        document.head.appendChild(script);
+        return this.sessionPromise;
     }
 
-    async connect() {
+    // Hover, focus or touch: start everything connecting needs before the click lands
+    async onIntent() {
+        if (this.state.isConnected) {
+            return;
+        }
         try {
-            this.state.error = null;
-
-            // Get token from Odoo backend
-            const tokenData = await this.rpc('/voice_agent/get_token', {});
-
-            if (tokenData.error) {
-                throw new Error(tokenData.error);
-            }
-
-            // Connect to LiveKit room
-            const LivekitClient = window.LivekitClient;
-            this.room = new LivekitClient.Room({
-                adaptiveStream: true,
-                dynacast: true,
-            });
-
-            // Set up event listeners
-            this.room.on('connected', () => {
-                console.log('Connected to LiveKit room');
-                this.state.isConnected = true;
-            });
-
-            this.room.on('disconnected', () => {
-                console.log('Disconnected from LiveKit');
-                this.state.isConnected = false;
-                this.state.isRecording = false;
-                this.state.isSpeaking = false;
-            });
-
-            this.room.on('dataReceived', (payload, participant) => {
-                this.handleNavigationMessage(payload);
-            });
-
-            // Connect to room
-            await this.room.connect(tokenData.url, tokenData.token);
-
-            // Enable microphone
-            await this.room.localParticipant.setMicrophoneEnabled(true);
-            this.state.isRecording = true;
-
+            const session = await this.loadSession();
+            await session.prepare();
         } catch (error) {
-            console.error('Connection error:', error);
-            this.state.error = error.message;
+            // The click retries and reports the error
+            console.warn('Voice session could not be prepared:', error);
         }
     }
 
-    async disconnect() {
-        if (this.room) {
-            await this.room.disconnect();
-            this.room = null;
-        }
-        this.state.isConnected = false;
-        this.state.isRecording = false;
-        this.state.isSpeaking = false;
-    }
-
     async toggleConnection() {
-        if (this.state.isConnected) {
-            await this.disconnect();
-        } else {
-            await this.connect();
-        }
-    }
-
-    handleNavigationMessage(payload) {
         try {
-            const decoder = new TextDecoder();
-            const message = JSON.parse(decoder.decode(payload));
-
-            if (message.type === 'agent-navigation-url') {
-                // Navigate to the specified path
-                window.dispatchEvent(new CustomEvent('voice-navigate', {
-                    detail: { pathname: message.pathname }
-                }));
+            this.state.error = null;
+            const session = await this.loadSession();
+            if (this.state.isConnected) {
+                await session.disconnect();
+            } else {
+                await session.connect();
             }
         } catch (error) {
-            console.error('Error handling navigation message:', error);
+            console.error('Connection error:', error);
+            this.state.error = error.message;
         }
     }
 }
@@ -35,18 +35,15 @@ echo "   Odoo Frontend: $ODOO_FRONTEND_URL"
 echo "   Log Level: $LOG_LEVEL"
 echo ""
 
-# Health check endpoint (simple HTTP server for Railway)
-# This allows Railway to monitor the agent's health
-if [ "$ENABLE_HEALTH_CHECK" = "true" ]; then
-    echo "🏥 Starting health check endpoint on port 8080..."
-    python -m http.server 8080 &
-    HEALTH_PID=$!
-    echo "   Health check PID: $HEALTH_PID"
+# Health check and metrics endpoints are served by the agent worker itself
+# (/healthz reports job and room state, /metrics serves Prometheus text)
+if [ "$ENABLE_HEALTH_CHECK" = "false" ]; then
+    export METRICS_PORT=0
+else
+    export METRICS_PORT="${METRICS_PORT:-8080}"
+    echo "🏥 Health check and metrics on port $METRICS_PORT (/healthz, /metrics)"
 fi
 
-# Trap signals for graceful shutdown
-trap 'echo "🛑 Received shutdown signal..."; [ -n "$HEALTH_PID" ] && kill $HEALTH_PID 2>/dev/null; exit 0' SIGTERM SIGINT
-
 echo "🚀 Launching LiveKit agent..."
 echo ""
 
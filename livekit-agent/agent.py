@@ -4,11 +4,17 @@ Handles voice commands in Arabic and English to navigate Odoo modules
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
+import time
+from dataclasses import dataclass
+from typing import Annotated, Optional
 from urllib.parse import urlparse
+import httpx
 from dotenv import load_dotenv
+from openai import AsyncClient
 
 from livekit import rtc
 from livekit.agents import (
@@ -18,10 +24,22 @@ from livekit.agents import (
     WorkerOptions,
     cli,
     llm,
+    metrics,
+    stt,
 )
 from livekit.agents.pipeline import VoicePipelineAgent
 from livekit.plugins import openai, silero
 
+from capacity import LOAD_THRESHOLD, LoadMonitor
+from chat_window import ChatWindow
+from gating import AudioGate, GatedSTT, GatedVAD
+from intents import FastPathStats, Intent, IntentMatcher, detect_language, fixed_replies, location_text, reply_text
+from menu_index import MenuIndex, MenuTarget, default_menu_index
+from navigation import NavigationChannel
+from speculation import SPECULATIVE_NAVIGATION, Speculator, TranscriptTap
+from telemetry import TurnTrace, recorder, start_metrics_server
+from tts_cache import CachedTTS
+
 # Load environment variables
 load_dotenv()
 
@@ -35,6 +53,9 @@ LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
 LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 FRONTEND_BASE_URL = os.getenv("ODOO_FRONTEND_URL", "http://localhost:8069")
+TTS_VOICE = os.getenv("OPENAI_TTS_VOICE", "alloy")
+
+GREETING = "Hello! I'm your Odoo voice assistant. You can ask me to navigate to different modules."
 
 # Load agent instructions
 INSTRUCTIONS_FILE = os.path.join(os.path.dirname(__file__), "prompts", "agent_instructions.txt")
@@ -51,150 +72,427 @@ You can help users navigate between different Odoo modules using voice commands
 Be friendly, concise, and helpful."""
 
 
+@dataclass
+class AgentResources:
+    """Per-process resources built once by prewarm and borrowed by every job"""
+
+    vad: silero.VAD
+    instructions: str
+    stt: openai.STT
+    llm: openai.LLM
+    tts: CachedTTS
+    menu_index: MenuIndex
+    intents: IntentMatcher
+    build_seconds: float
+
+    @classmethod
+    def build(cls) -> "AgentResources":
+        """Create the models and clients; the menu index and TTS cache are filled by load()"""
+        started = time.perf_counter()
+
+        # One keep-alive connection pool shared by the STT, LLM and TTS clients
+        client = AsyncClient(
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=httpx.Timeout(connect=15.0, read=5.0, write=5.0, pool=5.0),
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=120),
+            ),
+        )
+
+        menu_index = default_menu_index()
+        return cls(
+            vad=silero.VAD.load(),
+            instructions=load_instructions(),
+            stt=openai.STT(client=client),
+            llm=openai.LLM(model="gpt-4o", client=client),
+            tts=CachedTTS(openai.TTS(voice=TTS_VOICE, client=client), voice=TTS_VOICE),
+            menu_index=menu_index,
+            intents=IntentMatcher(menu_index),
+            build_seconds=time.perf_counter() - started,
+        )
+
+    async def load(self):
+        """Synthesize the fixed phrases; awaited by prewarm or by a cold job"""
+        started = time.perf_counter()
+
+        # Fixed phrases are synthesized once and played back from the shared cache.
+        # Warming uses its own client: prewarm runs on a throwaway loop the pooled one must not open connections on.
+        phrases = [GREETING, *fixed_replies(self.menu_index)]
+        self.tts.pin(phrases)
+        try:
+            warmer = CachedTTS(openai.TTS(voice=TTS_VOICE), voice=TTS_VOICE, store=self.tts.store)
+            added = await warmer.warm(phrases)
+            if added:
+                logger.info(f"Added {added} phrases to the TTS cache")
+        except Exception as e:
+            logger.error(f"Error warming TTS cache: {e}")
+
+        self.build_seconds += time.perf_counter() - started
+
+
 class OdooNavigationAgent:
     """Voice agent that handles Odoo navigation commands"""
 
     def __init__(self, ctx: JobContext):
         self.ctx = ctx
         self._room = None
+        self._navigation = None
+        self._menu_index = default_menu_index()
+        self._intents = None
+        self._tts = None
+        self._speculator = None
+        self._trace = TurnTrace()
+        self._gate = AudioGate()
+        self._gated = ()
+        self._participant = None
+        self._chat_window = ChatWindow()
+        self._fast_path = FastPathStats()
+        self._turn_started = None
+        self._turn_fast_path = False
+        # Language of the last user turn, for replies the LLM's function calls produce
+        self._language = "en"
+        self._job_started = None
+        self._warm_start = False
+
+    async def _borrow_resources(self) -> AgentResources:
+        """Return the resources prewarmed for this process, building them if prewarm did not run"""
+        resources = self.ctx.proc.userdata.get("resources")
+        self._warm_start = resources is not None
+        if resources is None:
+            resources = self.ctx.proc.userdata["resources"] = AgentResources.build()
+            await resources.load()
+            logger.info(f"Built agent resources on job start in {resources.build_seconds * 1000:.0f} ms (cold)")
+        return resources
 
     async def entrypoint(self):
         """Main entrypoint for the agent"""
+        self._job_started = time.perf_counter()
         logger.info(f"Starting Odoo Navigation Agent")
         logger.info(f"Frontend URL: {FRONTEND_BASE_URL}")
-
-        # Connect to the room
-        await self.ctx.connect(auto_subscribe=AutoSubscribe.AUDIO_ONLY)
-        self._room = self.ctx.room
-
-        # Load instructions
-        instructions = load_instructions()
-
-        # Create function context with navigation tools
-        fnc_ctx = llm.FunctionContext()
-
-        # Register navigation functions
-        fnc_ctx.ai_callable()(self.navigate_to_sales)
-        fnc_ctx.ai_callable()(self.navigate_to_crm)
-        fnc_ctx.ai_callable()(self.navigate_to_inventory)
-        fnc_ctx.ai_callable()(self.navigate_to_accounting)
-        fnc_ctx.ai_callable()(self.navigate_to_purchases)
-        fnc_ctx.ai_callable()(self.navigate_to_hr)
-        fnc_ctx.ai_callable()(self.navigate_to_projects)
-        fnc_ctx.ai_callable()(self.navigate_to_manufacturing)
-        fnc_ctx.ai_callable()(self.go_home)
-        fnc_ctx.ai_callable()(self.where_am_i)
-
-        # Create the voice pipeline agent
+        resources = await self._borrow_resources()
+
+        # Connect to the room; only the served participant's microphone is subscribed to, once they join
+        await self.ctx.connect(auto_subscribe=AutoSubscribe.SUBSCRIBE_NONE)
+        await self._attach(self.ctx.room, resources)
+        fnc_ctx = self._function_context()
+
+        # Tap the per-segment transcripts, which arrive before end of utterance, for tracing and speculation
+        if SPECULATIVE_NAVIGATION:
+            self._speculator = Speculator(
+                self._intents,
+                functools.partial(self._navigate_intent, speculative=True),
+                self._send_navigation_rollback,
+            )
+        speech_to_text = TranscriptTap(stt.StreamAdapter(stt=resources.stt, vad=resources.vad), self._on_transcript)
+
+        # Create the voice pipeline agent; VAD and STT get no audio while the agent speaks or the user is muted
+        self._gated = (GatedVAD(resources.vad, self._gate), GatedSTT(speech_to_text, self._gate))
         agent = VoicePipelineAgent(
-            vad=silero.VAD.load(),
-            stt=openai.STT(),
-            llm=openai.LLM(model="gpt-4o"),
-            tts=openai.TTS(),
+            vad=self._gated[0],
+            stt=self._gated[1],
+            llm=resources.llm,
+            tts=resources.tts,
             fnc_ctx=fnc_ctx,
             chat_ctx=llm.ChatContext().append(
                 role="system",
-                text=instructions,
+                text=resources.instructions,
             ),
+            before_llm_cb=self._before_llm,
+            allow_interruptions=self._interruptible,
         )
-
-        # Start the agent
-        agent.start(self.ctx.room)
+        agent.on("user_started_speaking", self._on_user_started_speaking)
+        agent.on("user_stopped_speaking", self._on_user_stopped_speaking)
+        agent.on("agent_started_speaking", self._on_agent_started_speaking)
+        agent.on("agent_stopped_speaking", self._on_agent_stopped_speaking)
+        agent.on("metrics_collected", self._on_metrics_collected)
+        self.ctx.room.on("track_published", self._on_track_published)
+        self.ctx.room.on("track_muted", self._on_track_muted)
+        self.ctx.room.on("track_unmuted", self._on_track_unmuted)
+        self.ctx.add_shutdown_callback(self._on_shutdown)
 
         # Wait for participant to join
         participant = await self.ctx.wait_for_participant()
         logger.info(f"Participant joined: {participant.identity}")
+        self._participant = participant
+        self._navigation.identity = participant.identity
+        if participant.identity in self._navigation.menus:
+            self._use_menus(self._navigation.menus[participant.identity][1])
+        recorder.update_session(state="active", participant=participant.identity)
+        for publication in list(participant.track_publications.values()):
+            self._on_track_published(publication, participant)
+
+        # Start the agent on that participant's audio
+        agent.start(self.ctx.room, participant)
 
         # Greet the user
-        await agent.say("Hello! I'm your Odoo voice assistant. You can ask me to navigate to different modules.", allow_interruptions=True)
+        await agent.say(GREETING, allow_interruptions=self._interruptible)
+
+    async def _attach(self, room: rtc.Room, resources: AgentResources):
+        """Bind the agent to a connected room and the menus it can navigate to"""
+        self._room = room
+        self._navigation = NavigationChannel(room)
+        self._navigation.on_menus = self._on_menus
+        recorder.start_session(room.name)
+
+        # The well-known apps serve until the widget reports the root menus its user can open
+        self._menu_index = resources.menu_index
+        self._intents = resources.intents
+        self._tts = resources.tts
+
+    def _on_menus(self, identity: str, targets: list[MenuTarget]):
+        if identity == self._navigation.identity:
+            self._use_menus(targets)
+
+    def _use_menus(self, targets: list[MenuTarget]):
+        """Resolve spoken names against the root menus the served user can open"""
+        self._menu_index = MenuIndex(targets)
+        self._intents = IntentMatcher(self._menu_index)
+        if self._speculator is not None:
+            self._speculator.intents = self._intents
+        self._tts.pin(fixed_replies(self._menu_index))
+
+    @property
+    def _interruptible(self) -> bool:
+        """Barge-in needs the user's audio while the agent speaks, which gating withholds"""
+        return not self._gate.while_speaking
+
+    def _function_context(self) -> llm.FunctionContext:
+        """Create function context with navigation tools"""
+        fnc_ctx = llm.FunctionContext()
+
+        # Register navigation functions
+        fnc_ctx.ai_callable()(self.navigate)
+        fnc_ctx.ai_callable()(self.go_home)
+        fnc_ctx.ai_callable()(self.where_am_i)
+        return fnc_ctx
 
     # Navigation Functions
 
-    async def navigate_to_sales(self):
-        """Navigate to Sales module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=sales.sale_menu_root"
-        await self._send_navigation_url(url)
-        return "Opening Sales module"
-
-    async def navigate_to_crm(self):
-        """Navigate to CRM/Customers module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=crm.crm_menu_root"
-        await self._send_navigation_url(url)
-        return "Opening CRM module"
-
-    async def navigate_to_inventory(self):
-        """Navigate to Inventory/Stock module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=stock.menu_stock_root"
-        await self._send_navigation_url(url)
-        return "Opening Inventory module"
-
-    async def navigate_to_accounting(self):
-        """Navigate to Accounting module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=account.menu_finance"
-        await self._send_navigation_url(url)
-        return "Opening Accounting module"
-
-    async def navigate_to_purchases(self):
-        """Navigate to Purchases module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=purchase.menu_purchase_root"
-        await self._send_navigation_url(url)
-        return "Opening Purchases module"
-
-    async def navigate_to_hr(self):
-        """Navigate to Human Resources module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=hr.menu_hr_root"
-        await self._send_navigation_url(url)
-        return "Opening HR module"
-
-    async def navigate_to_projects(self):
-        """Navigate to Projects module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=project.menu_main_pm"
-        await self._send_navigation_url(url)
-        return "Opening Projects module"
-
-    async def navigate_to_manufacturing(self):
-        """Navigate to Manufacturing/MRP module"""
-        url = f"{FRONTEND_BASE_URL}/web#menu_id=mrp.menu_mrp_root"
-        await self._send_navigation_url(url)
-        return "Opening Manufacturing module"
+    async def navigate(
+        self,
+        target: Annotated[
+            str,
+            llm.TypeInfo(description="The module or app to open, as the user named it, in English or Arabic"),
+        ],
+    ):
+        """Navigate to an installed Odoo module or app"""
+        with recorder.span("tool", tool="navigate"):
+            match = self._menu_index.match(target)
+            if match is None:
+                available = ", ".join(self._menu_index.names())
+                return f"No module called {target} is installed. Available modules: {available}"
+
+            menu, score = match
+            logger.info(f"Resolved '{target}' to {menu.xml_id or menu.name} (score {score:.2f})")
+            await self._open_menu(menu)
+            return reply_text(Intent("navigate", target=menu))
 
     async def go_home(self):
         """Navigate to home/dashboard"""
-        url = f"{FRONTEND_BASE_URL}/web"
-        await self._send_navigation_url(url)
-        return "Going to home page"
+        with recorder.span("tool", tool="go_home"):
+            url = f"{FRONTEND_BASE_URL}/web"
+            await self._send_navigation_url(url)
+            return reply_text(Intent("home"))
 
     async def where_am_i(self):
-        """Tell user their current location - they need to inform you"""
-        return "I need you to tell me where you are. What page or module are you currently viewing?"
+        """Tell the user which page or module they are currently viewing"""
+        state = self._navigation.state if self._navigation else None
+        if state is None:
+            return "I need you to tell me where you are. What page or module are you currently viewing?"
+        return location_text(state.app, state.action_name, self._language)
+
+    # Fast path
+
+    async def _before_llm(self, agent: VoicePipelineAgent, chat_ctx: llm.ChatContext):
+        """Answer plain navigation commands locally and leave everything else to the LLM"""
+        self._turn_started = time.perf_counter()
+        self._trace.mark("committed")
+        message = chat_ctx.messages[-1] if chat_ctx.messages else None
+        transcript = message.content if message and message.role == "user" else None
+        if isinstance(transcript, str):
+            self._language = detect_language(transcript)
+        intent = self._intents.match(transcript) if self._intents and isinstance(transcript, str) else None
+        if intent is not None:
+            intent = self._resolve_relative(intent)
+        self._turn_fast_path = intent is not None
+        navigated = await self._speculator.resolve(intent) if self._speculator else False
+
+        if intent is None:
+            prompt_tokens = self._chat_window.compact(chat_ctx, agent.chat_ctx)
+            recorder.increment("voice_agent_prompt_tokens_total", prompt_tokens)
+            logger.info(
+                f"LLM prompt ~{prompt_tokens} tokens ({len(chat_ctx.messages)} messages, "
+                f"{len(self._chat_window.summary)} summary lines)"
+            )
+            return agent.llm.chat(chat_ctx=chat_ctx, fnc_ctx=agent.fnc_ctx)
+
+        logger.info(f"Fast path: '{transcript}' -> {intent.action} {intent.target.name if intent.target else ''}")
+        reply = await self._run_intent(intent, navigated=navigated)
+        await agent.say(reply, allow_interruptions=self._interruptible)
+        # Returning False cancels the LLM reply for this turn
+        return False
+
+    def _resolve_relative(self, intent: Intent) -> Optional[Intent]:
+        """Resolve commands relative to the current page from its reported state, or None if it is unknown"""
+        if intent.action not in ("where", "parent"):
+            return intent
+        state = self._navigation.state if self._navigation else None
+        if state is None:
+            return None
+        if intent.action == "parent":
+            if state.app is None:
+                return Intent("home", language=intent.language)
+            return Intent("navigate", target=state.app, language=intent.language)
+        return intent
+
+    async def _run_intent(self, intent: Intent, navigated: bool = False) -> str:
+        """Execute a locally recognized intent and return the spoken confirmation"""
+        if intent.action == "where":
+            state = self._navigation.state
+            return location_text(state.app, state.action_name, intent.language)
+        if not navigated:
+            await self._navigate_intent(intent)
+        return reply_text(intent)
+
+    async def _navigate_intent(self, intent: Intent, speculative: bool = False):
+        if intent.action == "back":
+            await self._send_navigation_back()
+        elif intent.action == "home":
+            await self._send_navigation_url(f"{FRONTEND_BASE_URL}/web", speculative=speculative)
+        else:
+            await self._send_navigation_url(f"{FRONTEND_BASE_URL}/web{intent.target.hash_path}", speculative=speculative)
+
+    # Audio input
+
+    def _serves(self, participant: rtc.Participant, publication: rtc.TrackPublication) -> bool:
+        """Whether a track is the microphone of the participant this agent serves"""
+        return (
+            self._participant is not None
+            and participant.identity == self._participant.identity
+            and publication.source == rtc.TrackSource.SOURCE_MICROPHONE
+        )
 
-    async def _send_navigation_url(self, url: str):
+    def _on_track_published(self, publication: rtc.RemoteTrackPublication, participant: rtc.RemoteParticipant):
+        if self._serves(participant, publication):
+            publication.set_subscribed(True)
+            self._gate.muted = publication.muted
+            logger.info(f"Subscribed to the microphone of {participant.identity}")
+
+    def _on_track_muted(self, participant: rtc.Participant, publication: rtc.TrackPublication):
+        if self._serves(participant, publication):
+            self._gate.muted = True
+
+    def _on_track_unmuted(self, participant: rtc.Participant, publication: rtc.TrackPublication):
+        if self._serves(participant, publication):
+            self._gate.muted = False
+
+    # Tracing
+
+    def _on_transcript(self, event: stt.SpeechEvent):
+        if event.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+            self._trace.mark("stt_final")
+        if self._speculator is not None:
+            self._speculator.on_transcript(event)
+
+    def _on_user_started_speaking(self):
+        if self._speculator is not None:
+            self._speculator.on_speech_started()
+
+    def _on_user_stopped_speaking(self):
+        self._trace.mark("speech_end")
+        if self._speculator is not None:
+            self._speculator.on_speech_ended()
+
+    def _on_metrics_collected(self, collected: metrics.AgentMetrics):
+        # A negative ttft means the stream produced no tokens
+        if isinstance(collected, metrics.PipelineLLMMetrics) and collected.ttft >= 0:
+            recorder.observe("voice_agent_span_seconds", collected.ttft, span="llm_first_token")
+        elif isinstance(collected, metrics.PipelineTTSMetrics):
+            recorder.observe("voice_agent_span_seconds", collected.ttfb, span="tts_first_audio")
+        elif isinstance(collected, metrics.PipelineVADMetrics):
+            recorder.increment("voice_agent_vad_inference_seconds_total", collected.inference_duration_total)
+
+    def _on_agent_started_speaking(self):
+        self._gate.agent_speaking = True
+        if self._job_started is not None:
+            elapsed = time.perf_counter() - self._job_started
+            self._job_started = None
+            logger.info(
+                f"Greeting started {elapsed * 1000:.0f} ms after job start "
+                f"({'warm' if self._warm_start else 'cold'})"
+            )
+        if self._turn_started is None:
+            return
+        elapsed = time.perf_counter() - self._turn_started
+        self._turn_started = None
+        self._fast_path.record(self._turn_fast_path, elapsed)
+        trace = self._trace.finish("fast" if self._turn_fast_path else "llm")
+        if trace:
+            logger.info(f"Turn trace: {json.dumps(trace)}")
+        logger.info(f"Turn answered via {'fast path' if self._turn_fast_path else 'LLM'} in {elapsed * 1000:.0f} ms")
+
+    def _on_agent_stopped_speaking(self):
+        self._gate.agent_speaking = False
+
+    async def _on_shutdown(self):
+        recorder.update_session(state="closed")
+        for wrapper in self._gated:
+            wrapper.detach()
+        cpu = recorder.cpu_seconds()
+        wall = time.time() - recorder.session.get("started", time.time())
+        logger.info(
+            f"Session CPU: {cpu:.1f} s over {wall:.0f} s ({cpu / max(wall, 1):.1%} of a core), "
+            f"{self._gate.dropped_frames} input frames gated"
+        )
+        logger.info(self._fast_path.summary())
+        if self._tts is not None:
+            logger.info(self._tts.summary())
+        if self._speculator is not None:
+            logger.info(self._speculator.stats.summary())
+
+    async def _open_menu(self, menu: MenuTarget):
+        await self._send_navigation_url(f"{FRONTEND_BASE_URL}/web{menu.hash_path}")
+
+    async def _send_navigation_url(self, url: str, speculative: bool = False):
         """Helper to send navigation URL via data channel"""
         try:
             # Extract just the path part
             parsed = urlparse(url)
             pathname = parsed.fragment if parsed.fragment else parsed.path
 
-            # Send via data channel
-            navigation_data = {
-                "type": "agent-navigation-url",
-                "pathname": f"#{pathname}" if not pathname.startswith('#') else pathname
-            }
-
-            # Send to all participants in room
-            if self._room:
-                await self._room.local_participant.publish_data(
-                    json.dumps(navigation_data).encode('utf-8'),
-                    reliable=True
-                )
-                logger.info(f"Sent navigation command: {pathname}")
+            pathname = f"#{pathname}" if not pathname.startswith('#') else pathname
+
+            # Send to the served participant on the navigation topic
+            if self._navigation:
+                with recorder.span("publish"):
+                    seq = await self._navigation.navigate(pathname, speculative=speculative)
+                logger.info(f"Sent navigation command {seq}: {pathname}")
         except Exception as e:
             logger.error(f"Error sending navigation: {e}")
 
+    async def _send_navigation_back(self):
+        try:
+            if self._navigation:
+                await self._navigation.back()
+        except Exception as e:
+            logger.error(f"Error sending navigation back: {e}")
+
+    async def _send_navigation_rollback(self):
+        """Undo a speculative navigation the committed transcript did not confirm"""
+        try:
+            if self._navigation:
+                await self._navigation.rollback()
+        except Exception as e:
+            logger.error(f"Error sending navigation rollback: {e}")
+
 
 def prewarm(proc: JobProcess):
     """Prewarm function to load models before handling jobs"""
-    proc.userdata["vad"] = silero.VAD.load()
+    resources = AgentResources.build()
+    asyncio.run(resources.load())
+    proc.userdata["resources"] = resources
+    logger.info(f"Prewarmed agent resources in {resources.build_seconds * 1000:.0f} ms")
 
 
 async def entrypoint(ctx: JobContext):
@@ -204,10 +502,14 @@ async def entrypoint(ctx: JobContext):
 
 
 if __name__ == "__main__":
+    start_metrics_server()
+
     # Run the worker
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            load_fnc=LoadMonitor(),
+            load_threshold=LOAD_THRESHOLD,
         ),
     )
@@ -0,0 +1,79 @@
+"""
+Load reporting for LiveKit job dispatch
+Combines active sessions, VAD inference CPU time and job event-loop lag into the load the worker reports
+"""
+
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from typing import Optional
+
+from telemetry import active_sessions, collect, worker_gauges
+
+logger = logging.getLogger(__name__)
+
+# Concurrent jobs one worker replica accepts before it reports full load
+AGENT_MAX_JOBS = int(os.getenv("AGENT_MAX_JOBS", "4"))
+# Load above which the worker stops accepting jobs and the dispatcher picks another replica
+LOAD_THRESHOLD = float(os.getenv("AGENT_LOAD_THRESHOLD", "0.75"))
+# Share of the host's cores VAD inference may use before the worker is considered full
+VAD_CPU_BUDGET = float(os.getenv("AGENT_VAD_CPU_BUDGET", "0.5"))
+# Job event-loop lag at which audio starts to stutter
+MAX_LOOP_LAG = float(os.getenv("AGENT_MAX_LOOP_LAG", "0.1"))
+# Load samples the loop lag is taken as the median of, so a single stall does not refuse rooms
+LOOP_LAG_WINDOW = int(os.getenv("AGENT_LOOP_LAG_WINDOW", "5"))
+
+_VAD_SECONDS = "voice_agent_vad_inference_seconds_total"
+
+
+class LoadMonitor:
+    """load_fnc for WorkerOptions: the highest of the session, VAD CPU and loop-lag loads, from 0 to 1
+
+    Each term reaches LOAD_THRESHOLD, where dispatch stops sending rooms, exactly at its limit:
+    AGENT_MAX_JOBS jobs, the VAD CPU budget or a sustained AGENT_MAX_LOOP_LAG.
+    """
+
+    def __init__(self, max_jobs: int = AGENT_MAX_JOBS):
+        self.max_jobs = max(max_jobs, 1)
+        self.cores = os.cpu_count() or 1
+        self._last_sample: Optional[tuple[float, float]] = None
+        self._lags: deque[float] = deque(maxlen=max(LOOP_LAG_WINDOW, 1))
+        self._last_log = 0.0
+
+    def __call__(self) -> float:
+        try:
+            totals, sessions = collect()
+        except Exception as e:
+            logger.error(f"Error computing worker load: {e}")
+            return 0.0
+
+        active = active_sessions(sessions)
+        session_load = len(active) / self.max_jobs * LOAD_THRESHOLD
+
+        # VAD inference is the per-session CPU cost that grows with every room
+        now = time.monotonic()
+        vad_seconds = totals["counters"].get(_VAD_SECONDS, 0.0)
+        vad_load = 0.0
+        if self._last_sample is not None:
+            sampled_at, sampled_seconds = self._last_sample
+            elapsed = now - sampled_at
+            if elapsed > 0:
+                vad_cpu = max(vad_seconds - sampled_seconds, 0.0) / elapsed
+                vad_load = vad_cpu / (self.cores * VAD_CPU_BUDGET) * LOAD_THRESHOLD
+        self._last_sample = (now, vad_seconds)
+
+        self._lags.append(max((snapshot.get("loop_lag", 0.0) for snapshot in active), default=0.0))
+        loop_lag = statistics.median(self._lags)
+        lag_load = loop_lag / MAX_LOOP_LAG * LOAD_THRESHOLD
+
+        load = min(max(session_load, vad_load, lag_load), 1.0)
+        worker_gauges["voice_agent_load"] = load
+        if load >= LOAD_THRESHOLD and now - self._last_log > 30:
+            self._last_log = now
+            logger.info(
+                f"Worker at load {load:.2f} ({len(active)}/{self.max_jobs} jobs, "
+                f"VAD {vad_load:.2f}, loop lag {loop_lag * 1000:.0f} ms); new rooms go to other replicas"
+            )
+        return load
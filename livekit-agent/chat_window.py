@@ -0,0 +1,111 @@
+"""
+Bounded chat context for the LLM
+Keeps the instructions and the last turns verbatim and folds older turns into a short digest
+"""
+
+import logging
+import os
+from collections import deque
+from typing import Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger(__name__)
+
+# User turns sent verbatim with every request
+CHAT_CONTEXT_TURNS = int(os.getenv("CHAT_CONTEXT_TURNS", "6"))
+# Estimated prompt tokens per request; older turns are folded until the prompt fits
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "3000"))
+# Digest lines kept for folded turns, most recent last
+SUMMARY_LINES = 20
+DIGEST_CHARS = 120
+
+SUMMARY_HEADER = "Summary of the earlier conversation (oldest first):"
+
+
+def estimate_tokens(text: str) -> int:
+    # About four bytes of UTF-8 per token holds for both English and Arabic text
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def _message_text(message: llm.ChatMessage) -> str:
+    return message.content if isinstance(message.content, str) else ""
+
+
+def _shorten(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= DIGEST_CHARS else text[:DIGEST_CHARS - 3] + "..."
+
+
+def _digest(message: llm.ChatMessage) -> Optional[str]:
+    """One summary line for a folded message, or None if it carries nothing worth keeping"""
+    if message.role == "assistant" and message.tool_calls:
+        calls = ", ".join(f"{call.function_info.name}({call.raw_arguments})" for call in message.tool_calls)
+        return f"Assistant called {calls}"
+    text = _shorten(_message_text(message))
+    if not text:
+        return None
+    if message.role == "tool":
+        return f"Tool result: {text}"
+    return f"{message.role.capitalize()}: {text}"
+
+
+def _turns(messages: list[llm.ChatMessage]) -> list[list[llm.ChatMessage]]:
+    """Group messages into turns, each starting at a user message; tool calls stay with their results"""
+    turns: list[list[llm.ChatMessage]] = []
+    for message in messages:
+        if message.role == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+class ChatWindow:
+    """Compacts each LLM request and trims the same folded turns from the agent's own context"""
+
+    def __init__(self, max_turns: int = CHAT_CONTEXT_TURNS, token_budget: int = CHAT_CONTEXT_TOKEN_BUDGET):
+        self.max_turns = max(max_turns, 1)
+        self.token_budget = token_budget
+        self.summary: deque[str] = deque(maxlen=SUMMARY_LINES)
+
+    def _fold(self, turn: list[llm.ChatMessage]):
+        for message in turn:
+            line = _digest(message)
+            if line:
+                self.summary.append(line)
+
+    def compact(self, request: llm.ChatContext, live: Optional[llm.ChatContext] = None) -> int:
+        """Bound ``request`` in place and return its estimated prompt tokens
+
+        ``request`` is the copy the pipeline sends to the LLM. Folded messages are also removed from ``live``,
+        the agent's context, so it stops growing.
+        """
+        messages = request.messages
+        head = 1 if messages and messages[0].role == "system" else 0
+        instructions = messages[:head]
+        turns = _turns(messages[head:])
+
+        def prompt_tokens() -> int:
+            kept = instructions + [message for turn in turns for message in turn]
+            total = sum(estimate_tokens(_message_text(message)) for message in kept)
+            return total + (estimate_tokens("\n".join(self.summary)) if self.summary else 0)
+
+        folded = 0
+        while len(turns) > self.max_turns or (len(turns) > 1 and prompt_tokens() > self.token_budget):
+            turn = turns.pop(0)
+            self._fold(turn)
+            folded += len(turn)
+
+        if folded and live is not None:
+            # The live context holds the same prefix, minus the pending user message
+            live_prefix = live.messages[head:head + folded]
+            if [(m.role, m.content) for m in live_prefix] == [(m.role, m.content) for m in messages[head:head + folded]]:
+                del live.messages[head:head + folded]
+
+        kept = [message for turn in turns for message in turn]
+        if self.summary:
+            summary = llm.ChatMessage.create(text="\n".join([SUMMARY_HEADER, *self.summary]), role="system")
+            request.messages[:] = [*instructions, summary, *kept]
+        else:
+            request.messages[:] = [*instructions, *kept]
+        return prompt_tokens()
@@ -0,0 +1,110 @@
+"""
+Audio gating for the voice pipeline
+Stops feeding VAD and STT while the agent is speaking or the served user's microphone is muted
+"""
+
+import logging
+import os
+
+from livekit.agents import stt, vad
+
+from telemetry import recorder
+
+logger = logging.getLogger(__name__)
+
+# Closing the gate while the agent speaks saves the VAD and STT work on its echo, at the cost of barge-in:
+# the user cannot interrupt a reply. Off by default so interruptions keep working.
+GATE_WHILE_SPEAKING = os.getenv("AGENT_GATE_WHILE_SPEAKING", "false").lower() in ("1", "true", "yes")
+
+
+class AudioGate:
+    """Whether input audio should reach VAD and STT right now"""
+
+    def __init__(self, while_speaking: bool = GATE_WHILE_SPEAKING):
+        self.while_speaking = while_speaking
+        self.agent_speaking = False
+        self.muted = False
+        self.dropped_frames = 0
+
+    @property
+    def open(self) -> bool:
+        return not self.muted and not (self.while_speaking and self.agent_speaking)
+
+    def drop(self):
+        self.dropped_frames += 1
+        recorder.increment("voice_agent_gated_frames_total")
+
+
+class _GatedStream:
+    """Forwards a VAD or speech stream unchanged, except for frames pushed while the gate is closed"""
+
+    def __init__(self, stream, gate: AudioGate):
+        self._stream = stream
+        self._gate = gate
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def push_frame(self, frame):
+        if self._gate.open:
+            self._stream.push_frame(frame)
+        else:
+            self._gate.drop()
+
+    def flush(self):
+        self._stream.flush()
+
+    def end_input(self):
+        self._stream.end_input()
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._stream.__anext__()
+
+
+class _MetricsForwarder:
+    """Re-emits the metrics of a wrapped VAD or STT, which is shared by every job of the process
+
+    The handler outlives the wrapper unless detach() is called when the job ends; otherwise each
+    finished job would keep its wrapper alive and report every later event once more.
+    """
+
+    def _forward_metrics(self, *args, **kwargs):
+        self.emit("metrics_collected", *args, **kwargs)
+
+    def detach(self):
+        self._wrapped.off("metrics_collected", self._forward_metrics)
+
+
+class GatedVAD(_MetricsForwarder, vad.VAD):
+    """VAD wrapper whose streams only see audio while the gate is open"""
+
+    def __init__(self, wrapped: vad.VAD, gate: AudioGate):
+        super().__init__(capabilities=wrapped.capabilities)
+        self._wrapped = wrapped
+        self._gate = gate
+        wrapped.on("metrics_collected", self._forward_metrics)
+
+    def stream(self) -> _GatedStream:
+        return _GatedStream(self._wrapped.stream(), self._gate)
+
+
+class GatedSTT(_MetricsForwarder, stt.STT):
+    """Streaming STT wrapper whose streams only see audio while the gate is open"""
+
+    def __init__(self, wrapped: stt.STT, gate: AudioGate):
+        super().__init__(capabilities=wrapped.capabilities)
+        self._wrapped = wrapped
+        self._gate = gate
+        wrapped.on("metrics_collected", self._forward_metrics)
+
+    async def _recognize_impl(self, buffer, **kwargs) -> stt.SpeechEvent:
+        return await self._wrapped.recognize(buffer, **kwargs)
+
+    def stream(self, **kwargs) -> _GatedStream:
+        return _GatedStream(self._wrapped.stream(**kwargs), self._gate)
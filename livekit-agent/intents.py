@@ -0,0 +1,209 @@
+"""
+Local intent matcher for common voice commands
+Recognizes plain navigation commands so they can be answered without the LLM
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from menu_index import MenuIndex, MenuTarget, aliases, normalize
+
+# Leading verbs of a navigation command, including common transliterations
+NAVIGATION_VERBS = [
+    "open", "open up", "go to", "go", "take me to", "bring me to", "navigate to", "show me", "show",
+    "switch to", "launch", "start",
+    "افتح", "افتح لي", "افتحلي", "اذهب الى", "اذهب", "روح على", "روح الى", "روح", "خذني الى", "خذني",
+    "وديني على", "وديني", "انتقل الى", "انتقل", "اعرض", "ارني", "اعرض لي", "ودني",
+    "iftah", "eftah", "rooh", "ruh", "khodni", "wadini",
+]
+
+# Words that carry no meaning around the target name
+FILLER_WORDS = [
+    "please", "the", "module", "app", "application", "page", "screen", "for me", "now", "to",
+    "لو سمحت", "من فضلك", "قسم", "وحده", "تطبيق", "صفحه", "شاشه", "الى", "على", "لي",
+    "al", "el", "law samaht", "min fadlak",
+]
+
+HOME_PHRASES = [
+    "home", "home page", "homepage", "dashboard", "main page", "main menu", "start page",
+    "الرئيسيه", "الصفحه الرئيسيه", "البدايه", "الواجهه الرئيسيه",
+]
+
+# Relative commands answered from the page state the widget reports
+WHERE_PHRASES = [
+    "where am i", "what page is this", "which page am i on", "what module is this", "what app is this",
+    "اين انا", "وين انا", "انا وين", "انا فين", "في اي صفحه انا", "ما هذه الصفحه", "اي صفحه هذه",
+]
+
+BACK_PHRASES = [
+    "back", "go back", "take me back", "previous page", "last page",
+    "ارجع", "رجوع", "ارجع للخلف", "الصفحه السابقه", "للخلف",
+]
+
+PARENT_PHRASES = [
+    "parent menu", "the parent menu", "up", "go up", "up one level", "main menu of this app",
+    "القائمه الاب", "المستوى الاعلى", "اطلع لفوق",
+]
+
+# Commands with more words than this after stripping are left to the LLM
+MAX_TARGET_WORDS = 3
+
+# Spoken confirmations of fast-path intents
+REPLIES = {
+    "en": {
+        "home": "Going to home page",
+        "navigate": "Opening {name} module",
+        "back": "Going back",
+        "where": "You are in {name}",
+        "where_home": "You are on the home page",
+    },
+    "ar": {
+        "home": "جاري الانتقال إلى الصفحة الرئيسية",
+        "navigate": "جاري فتح {name}",
+        "back": "جاري الرجوع",
+        "where": "أنت في {name}",
+        "where_home": "أنت في الصفحة الرئيسية",
+    },
+}
+
+_ARABIC_LETTERS = re.compile(r"[\u0600-\u06FF]")
+
+
+@dataclass(frozen=True)
+class Intent:
+    """A command recognized without the LLM"""
+
+    action: str
+    target: Optional[MenuTarget] = None
+    score: float = 1.0
+    language: str = "en"
+
+
+def _alternation(phrases: list[str]) -> str:
+    """Regex alternation over normalized phrases, longest first"""
+    normalized = sorted({normalize(phrase) for phrase in phrases if normalize(phrase)}, key=len, reverse=True)
+    return "|".join(re.escape(phrase) for phrase in normalized)
+
+
+def detect_language(text: str) -> str:
+    return "ar" if _ARABIC_LETTERS.search(text or "") else "en"
+
+
+def spoken_name(target: MenuTarget, language: str) -> str:
+    """Name to use for a target when replying in ``language``"""
+    if language == "ar":
+        for alias in aliases(target.xml_id):
+            if _ARABIC_LETTERS.search(alias):
+                return alias
+    return target.name
+
+
+def reply_text(intent: Intent) -> str:
+    """Spoken confirmation for a locally handled intent"""
+    template = REPLIES[intent.language][intent.action]
+    return template.format(name=spoken_name(intent.target, intent.language) if intent.target else "")
+
+
+def fixed_replies(menu_index: MenuIndex) -> list[str]:
+    """Every confirmation the fast path can speak for the given menus, in both languages"""
+    replies = []
+    for language, templates in REPLIES.items():
+        replies.extend((templates["home"], templates["back"], templates["where_home"]))
+        replies.extend(
+            templates["navigate"].format(name=spoken_name(target, language)) for target in menu_index.targets
+        )
+    return replies
+
+
+def location_text(app: Optional[MenuTarget], action_name: Optional[str], language: str) -> str:
+    """Spoken description of the page the user is on"""
+    if app is None:
+        return REPLIES[language]["where_home"]
+    name = spoken_name(app, language)
+    if action_name and normalize(action_name) != normalize(app.name):
+        name = f"{name}, {action_name}"
+    return REPLIES[language]["where"].format(name=name)
+
+
+class IntentMatcher:
+    """Compiled phrase index for navigation commands in Arabic and English"""
+
+    def __init__(self, menu_index: MenuIndex, min_score: float = 0.85):
+        self.menu_index = menu_index
+        self.min_score = min_score
+        self._verb_re = re.compile(rf"^(?:{_alternation(NAVIGATION_VERBS)})(?:\s+|$)(.*)$")
+        self._filler_re = re.compile(rf"(?:^|\s)(?:{_alternation(FILLER_WORDS)})(?=\s|$)")
+        # Home phrases are kept whole as well as reduced: "start page" is nothing but a verb and a filler word
+        self._home_phrases = {normalize(phrase) for phrase in HOME_PHRASES}
+        self._home_phrases |= {self._reduce(phrase)[1] for phrase in self._home_phrases} - {""}
+        # Relative phrases are reduced the way transcripts are, so "go back" and "back" compare equal
+        self._relative = {}
+        for action, phrases in (("where", WHERE_PHRASES), ("back", BACK_PHRASES), ("parent", PARENT_PHRASES)):
+            for phrase in phrases:
+                self._relative.setdefault(self._reduce(normalize(phrase))[1], action)
+
+    def _strip_verb(self, text: str) -> tuple[bool, str]:
+        """Strip the leading verb; returns whether a verb was present and the rest"""
+        verb_match = self._verb_re.match(text)
+        return bool(verb_match), verb_match.group(1) if verb_match else text
+
+    def _reduce(self, text: str) -> tuple[bool, str]:
+        """Strip the leading verb and filler words; returns whether a verb was present and the rest"""
+        verb_match, rest = self._strip_verb(text)
+        return verb_match, " ".join(self._filler_re.sub(" ", f" {rest} ").split())
+
+    def match(self, transcript: str) -> Optional[Intent]:
+        """Return the intent of a final transcript, or None when the LLM should handle it"""
+        language = detect_language(transcript)
+        text = normalize(transcript)
+        if not text:
+            return None
+
+        verb_match, remainder = self._reduce(text)
+        if {text, self._strip_verb(text)[1], remainder} & self._home_phrases:
+            return Intent("home", language=language)
+        if remainder in self._relative:
+            return Intent(self._relative[remainder], language=language)
+        # The word cap only guards the fuzzy menu lookup against whole sentences
+        if not remainder or len(remainder.split()) > MAX_TARGET_WORDS:
+            return None
+
+        match = self.menu_index.match(remainder)
+        if match is None:
+            return None
+        target, score = match
+        # Without a navigation verb only an exact module name is unambiguous
+        if score < (self.min_score if verb_match else 1.0):
+            return None
+        return Intent("navigate", target=target, score=score, language=language)
+
+
+@dataclass
+class FastPathStats:
+    """Per-session counters comparing fast-path and LLM turn latency"""
+
+    hits: int = 0
+    misses: int = 0
+    fast_seconds: float = 0.0
+    llm_seconds: float = 0.0
+
+    def record(self, fast_path: bool, elapsed: float):
+        """Record a turn, timed from the final transcript to the first agent speech"""
+        if fast_path:
+            self.hits += 1
+            self.fast_seconds += elapsed
+        else:
+            self.misses += 1
+            self.llm_seconds += elapsed
+
+    def summary(self) -> str:
+        turns = self.hits + self.misses
+        if not turns:
+            return "Fast path: no turns"
+        text = f"Fast path: {self.hits}/{turns} turns ({self.hits / turns:.0%})"
+        if self.hits and self.misses:
+            fast_ms = self.fast_seconds / self.hits * 1000
+            llm_ms = self.llm_seconds / self.misses * 1000
+            text += f", {fast_ms:.0f} ms vs {llm_ms:.0f} ms via LLM, saving ~{llm_ms - fast_ms:.0f} ms per hit"
+        return text
@@ -0,0 +1,202 @@
+"""
+Load test for one voice agent worker
+Joins N simulated rooms at once, speaks a recorded command in each and measures the time to the agent's reply
+
+Usage:
+    python load_test.py --audio open_sales.wav --levels 1,2,4,6,8 --turns 3
+
+The audio file must be 16-bit mono PCM. Point the worker under test at the same LIVEKIT_URL, and keep
+other workers out of the project so every room is dispatched to it.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+import wave
+
+import numpy as np
+from dotenv import load_dotenv
+
+from livekit import api, rtc
+
+load_dotenv()
+
+LIVEKIT_URL = os.getenv("LIVEKIT_URL")
+LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
+LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
+
+FRAME_MS = 10
+# RMS of 16-bit samples above which agent audio counts as speech
+VOICE_RMS = 500
+# Agent silence that ends a reply
+REPLY_GAP = 1.0
+
+
+def load_pcm(path: str) -> tuple[bytes, int]:
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise SystemExit(f"{path} must be 16-bit mono PCM")
+        return f.readframes(f.getnframes()), f.getframerate()
+
+
+class Microphone:
+    """Publishes silence in real time, replacing it with an utterance on request"""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.source = rtc.AudioSource(sample_rate, 1)
+        self._frame_bytes = sample_rate * FRAME_MS // 1000 * 2
+        self._pending = b""
+        self._done = asyncio.Event()
+
+    async def run(self):
+        started = time.monotonic()
+        sent = 0
+        while True:
+            chunk = self._pending[:self._frame_bytes]
+            self._pending = self._pending[self._frame_bytes:]
+            if chunk and not self._pending:
+                self._done.set()
+            chunk = chunk.ljust(self._frame_bytes, b"\0")
+            frame = rtc.AudioFrame(chunk, self.sample_rate, 1, len(chunk) // 2)
+            await self.source.capture_frame(frame)
+            sent += 1
+            # Pace frames in real time, as a browser microphone would
+            await asyncio.sleep(max(started + sent * FRAME_MS / 1000 - time.monotonic(), 0))
+
+    async def speak(self, pcm: bytes):
+        """Return when the last frame of the utterance has been sent"""
+        self._done.clear()
+        self._pending = pcm
+        await self._done.wait()
+
+
+class Listener:
+    """Follows the agent's audio track and tracks when it speaks"""
+
+    def __init__(self):
+        self.voice = asyncio.Event()
+        self.last_voice = 0.0
+
+    async def run(self, track: rtc.Track):
+        async for event in rtc.AudioStream(track):
+            samples = np.frombuffer(event.frame.data, dtype=np.int16).astype(np.float32)
+            if samples.size and np.sqrt(np.mean(samples ** 2)) > VOICE_RMS:
+                self.last_voice = time.monotonic()
+                self.voice.set()
+
+    async def wait_reply(self, timeout: float) -> float:
+        """Wait for the agent to start speaking and return the delay"""
+        started = time.monotonic()
+        self.voice.clear()
+        await asyncio.wait_for(self.voice.wait(), timeout)
+        return time.monotonic() - started
+
+    async def wait_quiet(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and time.monotonic() - self.last_voice < REPLY_GAP:
+            await asyncio.sleep(0.1)
+
+
+async def run_room(pcm: bytes, sample_rate: int, turns: int, timeout: float) -> tuple[list[float], int]:
+    """One simulated user: greeting, then ``turns`` commands. Returns reply delays and failed turns."""
+    room_name = f"loadtest-{uuid.uuid4().hex[:8]}"
+    token = (
+        api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
+        .with_identity(f"user-{room_name}")
+        .with_grants(api.VideoGrants(room_join=True, room=room_name))
+        .to_jwt()
+    )
+    room = rtc.Room()
+    listener = Listener()
+    agent_track = asyncio.Event()
+    tasks = []
+
+    @room.on("track_subscribed")
+    def on_track_subscribed(track: rtc.Track, publication, participant):
+        if track.kind == rtc.TrackKind.KIND_AUDIO:
+            tasks.append(asyncio.create_task(listener.run(track)))
+            agent_track.set()
+
+    delays, failures = [], 0
+    try:
+        await room.connect(LIVEKIT_URL, token)
+        mic = Microphone(sample_rate)
+        track = rtc.LocalAudioTrack.create_audio_track("microphone", mic.source)
+        await room.local_participant.publish_track(
+            track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+        )
+        tasks.append(asyncio.create_task(mic.run()))
+
+        # The greeting shows the agent has joined; it is not measured
+        await asyncio.wait_for(agent_track.wait(), timeout)
+        await listener.wait_reply(timeout)
+        await listener.wait_quiet(timeout)
+
+        for _ in range(turns):
+            await mic.speak(pcm)
+            try:
+                delays.append(await listener.wait_reply(timeout))
+                await listener.wait_quiet(timeout)
+            except asyncio.TimeoutError:
+                failures += 1
+    except asyncio.TimeoutError:
+        failures += turns - len(delays)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await room.disconnect()
+    return delays, failures
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="16-bit mono WAV with a spoken command")
+    parser.add_argument("--levels", default="1,2,4,6,8", help="Concurrent room counts to test, in order")
+    parser.add_argument("--turns", type=int, default=3, help="Commands spoken per room")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Seconds to wait for a reply")
+    parser.add_argument(
+        "--degradation", type=float, default=0.5,
+        help="p95 increase over a single room, as a fraction, at which latency counts as degraded",
+    )
+    args = parser.parse_args()
+
+    pcm, sample_rate = load_pcm(args.audio)
+    levels = [int(level) for level in args.levels.split(",")]
+
+    baseline = None
+    capacity = 0
+    print(f"{'rooms':>5} {'turns':>5} {'failed':>6} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7}")
+    for level in levels:
+        results = await asyncio.gather(*(run_room(pcm, sample_rate, args.turns, args.timeout) for _ in range(level)))
+        delays = [delay for room_delays, _ in results for delay in room_delays]
+        failed = sum(failures for _, failures in results)
+        p50, p95 = percentile(delays, 50), percentile(delays, 95)
+        print(
+            f"{level:>5} {len(delays):>5} {failed:>6} {p50 * 1000:>7.0f} {p95 * 1000:>7.0f} "
+            f"{max(delays, default=float('nan')) * 1000:>7.0f}"
+        )
+
+        if baseline is None:
+            baseline = p95
+        if failed or p95 > baseline * (1 + args.degradation):
+            print(f"Latency degraded at {level} concurrent rooms")
+            break
+        capacity = level
+        # Let the worker release the finished jobs before the next level
+        await asyncio.sleep(5)
+
+    print(f"Capacity: {capacity} concurrent rooms within {args.degradation:.0%} of single-room p95")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
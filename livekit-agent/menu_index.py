@@ -0,0 +1,136 @@
+"""
+Menu index for voice navigation
+Resolves spoken Arabic/English module names to the root menus the user can open, as reported by the Odoo widget
+"""
+
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+# Spoken names (English, Arabic, transliterated Arabic) for well-known apps, keyed by the module of their root menu
+# xml_id, or by the full xml_id for modules such as base that own several root menus
+MODULE_ALIASES = {
+    "sale": ["sales", "sale", "sales orders", "quotations", "المبيعات", "مبيعات", "البيع", "mabiat", "mabee3at"],
+    "crm": ["crm", "customers", "leads", "pipeline", "العملاء", "عملاء", "إدارة العلاقات", "إدارة العملاء", "omala", "3omala"],
+    "stock": ["inventory", "stock", "warehouse", "المخزون", "مخزون", "المستودع", "المخازن", "makhzoon", "makhzon"],
+    "account": ["accounting", "invoicing", "invoices", "finance", "المحاسبة", "محاسبة", "الفواتير", "المالية", "muhasaba", "mohasaba"],
+    "purchase": ["purchase", "purchases", "purchasing", "المشتريات", "مشتريات", "الشراء", "mushtarayat", "moshtarayat"],
+    "hr": ["hr", "human resources", "employees", "الموارد البشرية", "الموظفين", "موظفين"],
+    "project": ["project", "projects", "المشاريع", "مشاريع", "المشروعات", "mashari", "mashare3"],
+    "mrp": ["manufacturing", "mrp", "production", "التصنيع", "الإنتاج", "التصنيع والإنتاج"],
+    "point_of_sale": ["point of sale", "pos", "نقاط البيع", "نقطة البيع"],
+    "hr_expense": ["expenses", "expense", "المصروفات", "المصاريف"],
+    "calendar": ["calendar", "التقويم", "المواعيد"],
+    "contacts": ["contacts", "جهات الاتصال", "الأسماء"],
+    "mail": ["discuss", "chat", "messages", "المحادثات", "الرسائل", "المناقشة"],
+    "website": ["website", "الموقع", "الموقع الإلكتروني"],
+    "base.menu_administration": ["settings", "الإعدادات", "إعدادات"],
+}
+
+# Used until the widget reports the user's root menus: the apps the agent always knew about
+DEFAULT_ROOT_MENUS = [
+    ("sale.sale_menu_root", "Sales"),
+    ("crm.crm_menu_root", "CRM"),
+    ("stock.menu_stock_root", "Inventory"),
+    ("account.menu_finance", "Accounting"),
+    ("purchase.menu_purchase_root", "Purchase"),
+    ("hr.menu_hr_root", "Employees"),
+    ("project.menu_main_pm", "Project"),
+    ("mrp.menu_mrp_root", "Manufacturing"),
+    ("base.menu_administration", "Settings"),
+]
+
+def aliases(target_xml_id: str) -> list[str]:
+    """Spoken names of the root menu with the given xml_id"""
+    if target_xml_id in MODULE_ALIASES:
+        return MODULE_ALIASES[target_xml_id]
+    return MODULE_ALIASES.get(target_xml_id.split(".", 1)[0], [])
+
+
+_ARABIC_DIACRITICS = re.compile(r"[\u064B-\u0652\u0670\u0640]")
+_ARABIC_PREFIXES = ("وال", "بال", "لل", "ال")
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Fold case, Arabic letter variants and articles so spoken forms compare equal"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _ARABIC_DIACRITICS.sub("", text)
+    text = re.sub("[أإآ]", "ا", text).replace("ى", "ي").replace("ة", "ه")
+    text = _PUNCTUATION.sub(" ", text).replace("_", " ")
+    words = []
+    for word in text.split():
+        for prefix in _ARABIC_PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 3:
+                word = word[len(prefix):]
+                break
+        words.append(word)
+    return " ".join(words)
+
+
+@dataclass(frozen=True)
+class MenuTarget:
+    """A root menu the agent can navigate to"""
+
+    xml_id: str
+    name: str
+    menu_id: Optional[int] = None
+
+    @property
+    def module(self) -> str:
+        return self.xml_id.split(".", 1)[0]
+
+    @property
+    def hash_path(self) -> str:
+        return f"#menu_id={self.menu_id or self.xml_id}"
+
+
+class MenuIndex:
+    """Alias table over root menus with exact, phrase and fuzzy matching"""
+
+    def __init__(self, targets: list[MenuTarget]):
+        self.targets = list(targets)
+        self._aliases: dict[str, MenuTarget] = {}
+        for target in self.targets:
+            names = [target.name, target.module, *aliases(target.xml_id)]
+            for name in names:
+                alias = normalize(name)
+                if alias:
+                    self._aliases.setdefault(alias, target)
+
+    def names(self) -> list[str]:
+        return [target.name for target in self.targets]
+
+    def match(self, query: str, cutoff: float = 0.75) -> Optional[tuple[MenuTarget, float]]:
+        """Return the best target for a spoken name with a 0-1 confidence score"""
+        text = normalize(query)
+        if not text:
+            return None
+        if text in self._aliases:
+            return self._aliases[text], 1.0
+
+        # A known alias spoken as whole words inside a longer phrase
+        padded = f" {text} "
+        phrase_hits = [alias for alias in self._aliases if f" {alias} " in padded]
+        if phrase_hits:
+            return self._aliases[max(phrase_hits, key=len)], 0.95
+
+        # Fuzzy match each alias against same-length word windows of the query
+        words = text.split()
+        best, best_score = None, 0.0
+        for alias, target in self._aliases.items():
+            size = len(alias.split())
+            windows = [" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))]
+            score = max(difflib.SequenceMatcher(None, alias, window).ratio() for window in windows)
+            if score > best_score:
+                best, best_score = target, score
+        if best is not None and best_score >= cutoff:
+            return best, best_score
+        return None
+
+
+def default_menu_index() -> MenuIndex:
+    return MenuIndex([MenuTarget(xml_id, name) for xml_id, name in DEFAULT_ROOT_MENUS])
+
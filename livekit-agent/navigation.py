@@ -0,0 +1,197 @@
+"""
+Navigation protocol between the agent and the Odoo voice widget
+Compact, versioned messages on a dedicated data topic, sent only to the served participant and acknowledged by the page
+
+Every message is a JSON array whose first two fields are the protocol version and the message kind:
+    [1, "n", seq, pathname, speculative]   agent -> page: navigate to pathname (speculative is 0 or 1)
+    [1, "r", seq]                          agent -> page: undo the speculative navigation seq
+    [1, "b", seq]                          agent -> page: go back in the browser history
+    [1, "a", seq, location]                page -> agent: navigation seq applied, page is now at location
+    [1, "s", location, app_id, app_name, app_xmlid, action_name, model, view_type]
+                                           page -> agent: the page changed (fields may be null)
+    [1, "m", version, [[menu_id, xml_id, name], ...]]
+                                           page -> agent: the root menus the user can open, sent on connect and
+                                           whenever their version changes
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from livekit import rtc
+
+from menu_index import MenuTarget
+from telemetry import recorder
+
+logger = logging.getLogger(__name__)
+
+NAV_TOPIC = "odoo-nav"
+NAV_PROTOCOL_VERSION = 1
+# Seconds to wait for the page's ack before sending a navigation again
+NAV_ACK_TIMEOUT = float(os.getenv("NAV_ACK_TIMEOUT", "2"))
+NAV_RETRIES = int(os.getenv("NAV_RETRIES", "2"))
+
+
+def encode(kind: str, *fields) -> bytes:
+    return json.dumps([NAV_PROTOCOL_VERSION, kind, *fields], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode(payload: bytes) -> Optional[list]:
+    """Return the fields after the version, or None for malformed or other-version messages"""
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(message, list) or len(message) < 2 or message[0] != NAV_PROTOCOL_VERSION:
+        return None
+    return message[1:]
+
+
+@dataclass
+class PageState:
+    """What a participant's page shows, as last reported by the widget"""
+
+    location: str
+    app_id: Optional[int] = None
+    app_name: Optional[str] = None
+    app_xmlid: Optional[str] = None
+    action_name: Optional[str] = None
+    model: Optional[str] = None
+    view_type: Optional[str] = None
+    updated: float = field(default_factory=time.monotonic)
+
+    @property
+    def app(self) -> Optional[MenuTarget]:
+        """Root menu of the current app, or None on the home page"""
+        if not self.app_id:
+            return None
+        return MenuTarget(xml_id=self.app_xmlid or "", name=self.app_name or "", menu_id=self.app_id)
+
+
+class NavigationChannel:
+    """Sends navigations to one participant and tracks their acknowledgements and page state"""
+
+    def __init__(self, room: rtc.Room):
+        self.room = room
+        self.identity: Optional[str] = None
+        # Page state and visible root menus per participant, kept current by the widget
+        self.states: dict[str, PageState] = {}
+        self.menus: dict[str, tuple[str, list[MenuTarget]]] = {}
+        # Called with the identity and root menus whenever a participant reports a new menu version
+        self.on_menus: Optional[Callable[[str, list[MenuTarget]], None]] = None
+        self._seq = 0
+        # Sequence number of the last navigation if it was speculative, the only one a rollback may undo
+        self._speculative_seq: Optional[int] = None
+        self._acks: dict[int, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        room.on("data_received", self._on_data_received)
+
+    async def _publish(self, payload: bytes):
+        await self.room.local_participant.publish_data(
+            payload,
+            reliable=True,
+            destination_identities=[self.identity] if self.identity else [],
+            topic=NAV_TOPIC,
+        )
+
+    @property
+    def state(self) -> Optional[PageState]:
+        """Page state of the served participant"""
+        return self.states.get(self.identity) if self.identity else None
+
+    async def navigate(self, pathname: str, speculative: bool = False) -> int:
+        """Publish a navigation and return its sequence number; the ack is awaited in the background"""
+        seq = await self._send("n", pathname, int(speculative))
+        if speculative:
+            self._speculative_seq = seq
+        return seq
+
+    async def back(self) -> int:
+        return await self._send("b")
+
+    async def _send(self, kind: str, *fields) -> int:
+        self._seq += 1
+        seq = self._seq
+        self._speculative_seq = None
+        payload = encode(kind, seq, *fields)
+        self._acks[seq] = asyncio.get_running_loop().create_future()
+        sent_at = time.perf_counter()
+        await self._publish(payload)
+
+        task = asyncio.create_task(self._await_ack(seq, payload, sent_at))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return seq
+
+    async def rollback(self):
+        """Undo the last navigation if it was speculative; the page ignores it once a later one was applied"""
+        if self._speculative_seq is not None:
+            await self._publish(encode("r", self._speculative_seq))
+            self._speculative_seq = None
+
+    async def _await_ack(self, seq: int, payload: bytes, sent_at: float):
+        ack = self._acks[seq]
+        try:
+            for attempt in range(NAV_RETRIES + 1):
+                if attempt:
+                    recorder.increment("voice_agent_navigation_retries_total")
+                    logger.info(f"Navigation {seq} not acknowledged, sending again (attempt {attempt + 1})")
+                    await self._publish(payload)
+                try:
+                    location = await asyncio.wait_for(asyncio.shield(ack), NAV_ACK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    continue
+                rtt = time.perf_counter() - sent_at
+                recorder.observe("voice_agent_span_seconds", rtt, span="navigation_ack")
+                logger.info(f"Navigation {seq} acknowledged in {rtt * 1000:.0f} ms at {location}")
+                return
+            recorder.increment("voice_agent_navigation_failures_total")
+            logger.warning(f"Navigation {seq} was never acknowledged by {self.identity or 'the room'}")
+        finally:
+            self._acks.pop(seq, None)
+
+    def _on_menus(self, identity: str, version: str, menus: list):
+        previous = self.menus.get(identity)
+        if previous is not None and previous[0] == version:
+            return
+        targets = [
+            MenuTarget(xml_id=xml_id or "", name=name, menu_id=menu_id)
+            for menu_id, xml_id, name in (menu[:3] for menu in menus if isinstance(menu, list) and len(menu) >= 3)
+            if menu_id and name
+        ]
+        self.menus[identity] = (version, targets)
+        logger.info(f"{identity} can open {len(targets)} root menus (version {version})")
+        if self.on_menus is not None:
+            self.on_menus(identity, targets)
+
+    def _on_data_received(self, packet: rtc.DataPacket):
+        if packet.topic != NAV_TOPIC:
+            return
+        if self.identity and (packet.participant is None or packet.participant.identity != self.identity):
+            return
+        message = decode(packet.data)
+        if not message or packet.participant is None:
+            return
+        identity = packet.participant.identity
+
+        if message[0] == "s" and len(message) >= 2:
+            fields = (message[1:] + [None] * 7)[:7]
+            self.states[identity] = PageState(*fields)
+            return
+        if message[0] == "m" and len(message) >= 3 and isinstance(message[2], list):
+            self._on_menus(identity, message[1], message[2])
+            return
+        if message[0] != "a" or len(message) < 3:
+            return
+        seq, location = message[1], message[2]
+        if identity in self.states:
+            self.states[identity].location = location
+        else:
+            self.states[identity] = PageState(location)
+        ack = self._acks.get(seq)
+        if ack is not None and not ack.done():
+            ack.set_result(location)
@@ -0,0 +1,398 @@
+"""
+Offline replay benchmark for the voice agent
+Drives OdooNavigationAgent through recorded sessions with a fake room, a simulated Odoo page and stub STT, LLM and TTS
+
+Usage:
+    python replay.py fixtures/replay_sessions.json --stt-ms 300 --llm-ms 700 --tts-ms 250
+
+Each session turn holds the user's transcript and, for turns the fast path does not answer, what the LLM would do:
+    {"user": "open sales", "expect": "sale.sale_menu_root"}
+    {"user": "I need to check stock levels", "llm": {"call": "navigate", "args": {"target": "inventory"}},
+     "expect": "stock.menu_stock_root"}
+"expect" is the xml_id of the root menu the turn should open, "home", "back", or null for no navigation.
+An optional "audio" WAV path adds the utterance length, scaled by --stt-rtf, to the STT latency.
+Nothing here touches the network: menus come from the fixture file and the page is simulated in process.
+"""
+
+import os
+import tempfile
+
+# Keep the agent's metrics files out of the real worker's directory
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="voice-agent-replay-"))
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+import wave
+from types import SimpleNamespace
+from typing import Optional
+
+from livekit.agents import llm, stt
+
+from agent import GREETING, AgentResources, OdooNavigationAgent, load_instructions
+from intents import IntentMatcher, fixed_replies
+from menu_index import MenuTarget, default_menu_index
+from navigation import NAV_TOPIC, decode, encode
+
+logger = logging.getLogger("replay")
+
+USER_IDENTITY = "replay-user"
+
+
+class SimulatedPage:
+    """The Odoo web client as the widget reports it: applies navigations, acks them and pushes page state"""
+
+    def __init__(self, room: "FakeRoom", menus: list[MenuTarget], latency: float):
+        self.room = room
+        self.latency = latency
+        self.menus = menus
+        self.history = ["#/web"]
+        self._menus_by_path = {}
+        for menu in menus:
+            self._menus_by_path[menu.hash_path] = menu
+            self._menus_by_path[f"#menu_id={menu.xml_id}"] = menu
+        self._last_seq = 0
+        self._speculative_seq = None
+
+    @property
+    def location(self) -> str:
+        return self.history[-1]
+
+    async def receive(self, payload: bytes):
+        await asyncio.sleep(self.latency)
+        message = decode(payload)
+        if not message:
+            return
+        kind, seq = message[0], message[1]
+        if kind == "r":
+            if self._speculative_seq is not None and seq == self._speculative_seq and len(self.history) > 1:
+                self.history.pop()
+                self._speculative_seq = None
+                self.send_state()
+            return
+        if seq > self._last_seq:
+            self._last_seq = seq
+            if kind == "n" and message[2] == self.location:
+                self._speculative_seq = None
+            elif kind == "n":
+                self.history.append(message[2])
+                self._speculative_seq = seq if message[3] else None
+            elif kind == "b" and len(self.history) > 1:
+                self.history.pop()
+                self._speculative_seq = None
+            self.send_state()
+        self.room.deliver(encode("a", seq, self.location))
+
+    def send_menus(self):
+        """The root menus the user can open, as the widget sends them on connect"""
+        self.room.deliver(encode("m", "replay", [[menu.menu_id, menu.xml_id, menu.name] for menu in self.menus]))
+
+    def send_state(self):
+        menu = self._menus_by_path.get(self.location)
+        fields = [self.location, None, None, None, None, None, None]
+        if menu is not None:
+            fields[1:5] = [menu.menu_id, menu.name, menu.xml_id, menu.name]
+        self.room.deliver(encode("s", *fields))
+
+    def describe(self, payload: bytes) -> Optional[str]:
+        """What a navigation message asks for, in the fixtures' "expect" terms"""
+        message = decode(payload)
+        if not message or message[0] not in ("n", "b"):
+            return None
+        if message[0] == "b":
+            return "back"
+        menu = self._menus_by_path.get(message[2])
+        return menu.xml_id if menu is not None else "home"
+
+
+class FakeLocalParticipant:
+    def __init__(self, room: "FakeRoom"):
+        self.room = room
+
+    async def publish_data(self, payload: bytes, *, reliable: bool = True, destination_identities=None, topic: str = ""):
+        self.room.published.append(payload)
+        if topic == NAV_TOPIC:
+            task = asyncio.create_task(self.room.page.receive(payload))
+            self.room.tasks.add(task)
+            task.add_done_callback(self.room.tasks.discard)
+
+
+class FakeRoom:
+    """Just enough of rtc.Room for the agent: data publishing and data_received callbacks"""
+
+    def __init__(self, name: str, menus: list[MenuTarget], page_latency: float):
+        self.name = name
+        self.published: list[bytes] = []
+        self.tasks: set[asyncio.Task] = set()
+        self.local_participant = FakeLocalParticipant(self)
+        self.page = SimulatedPage(self, menus, page_latency)
+        self._user = SimpleNamespace(identity=USER_IDENTITY)
+        self._callbacks: dict[str, list] = {}
+
+    def on(self, event: str, callback):
+        self._callbacks.setdefault(event, []).append(callback)
+        return callback
+
+    def deliver(self, payload: bytes):
+        packet = SimpleNamespace(data=payload, topic=NAV_TOPIC, participant=self._user)
+        for callback in self._callbacks.get("data_received", []):
+            callback(packet)
+
+
+class StubTTS:
+    """Fixed latency synthesis; pinned phrases come from the cache almost instantly"""
+
+    def __init__(self, latency: float, cached_latency: float):
+        self.latency = latency
+        self.cached_latency = cached_latency
+        self.hits = 0
+        self.misses = 0
+        self._pinned: set[str] = set()
+
+    def pin(self, phrases):
+        self._pinned.update(phrase.strip() for phrase in phrases)
+
+    async def speak(self, text: str):
+        if text.strip() in self._pinned:
+            self.hits += 1
+            await asyncio.sleep(self.cached_latency)
+        else:
+            self.misses += 1
+            await asyncio.sleep(self.latency)
+
+    def summary(self) -> str:
+        return f"TTS cache: {self.hits} hits, {self.misses} misses"
+
+
+class StubLLM:
+    def __init__(self):
+        self.requests: list[llm.ChatContext] = []
+
+    def chat(self, *, chat_ctx: llm.ChatContext, fnc_ctx=None):
+        self.requests.append(chat_ctx)
+        return chat_ctx
+
+
+class StubPipeline:
+    """Stands in for VoicePipelineAgent in _before_llm: llm, fnc_ctx, chat_ctx and say"""
+
+    def __init__(self, agent: OdooNavigationAgent, tts: StubTTS, instructions: str):
+        self.agent = agent
+        self.tts = tts
+        self.llm = StubLLM()
+        self.fnc_ctx = agent._function_context()
+        self.chat_ctx = llm.ChatContext().append(role="system", text=instructions)
+        self.spoken_at: Optional[float] = None
+
+    async def say(self, text: str, allow_interruptions: bool = True, add_to_chat_ctx: bool = True):
+        await self.tts.speak(text)
+        self.spoken_at = time.perf_counter()
+        self.agent._on_agent_started_speaking()
+        if add_to_chat_ctx:
+            self.chat_ctx.append(role="assistant", text=text)
+
+
+def _audio_seconds(path: Optional[str]) -> float:
+    if not path:
+        return 0.0
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+class Replay:
+    def __init__(self, menus: list[MenuTarget], args: argparse.Namespace):
+        self.menus = menus
+        self.args = args
+        # What prewarm builds; each session switches to its user's menus when the page reports them
+        self.index = default_menu_index()
+        self.turns: list[dict] = []
+        self.session_memory: list[int] = []
+        self.session_cpu: list[float] = []
+
+    def _resources(self, tts: StubTTS) -> AgentResources:
+        tts.pin([GREETING, *fixed_replies(self.index)])
+        return AgentResources(
+            vad=None,
+            instructions=load_instructions(),
+            stt=None,
+            llm=None,
+            tts=tts,
+            menu_index=self.index,
+            intents=IntentMatcher(self.index),
+            build_seconds=0.0,
+        )
+
+    async def run_session(self, name: str, turns: list[dict]):
+        args = self.args
+        tracemalloc.reset_peak()
+        cpu_started = time.process_time()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        room = FakeRoom(f"replay-{name}", self.menus, args.page_ms / 1000)
+        tts = StubTTS(args.tts_ms / 1000, args.tts_cached_ms / 1000)
+        resources = self._resources(tts)
+        agent = OdooNavigationAgent(SimpleNamespace(room=room, proc=SimpleNamespace(userdata={"resources": resources})))
+        await agent._attach(room, resources)
+        agent._navigation.identity = USER_IDENTITY
+        pipeline = StubPipeline(agent, tts, resources.instructions)
+        room.page.send_menus()
+        room.page.send_state()
+        await pipeline.say(GREETING)
+
+        for turn in turns:
+            self.turns.append(await self.run_turn(name, agent, pipeline, room, turn))
+            # Think time between turns lets acks and page state settle
+            await asyncio.sleep(args.gap_ms / 1000)
+
+        await agent._on_shutdown()
+        for task in list(room.tasks):
+            task.cancel()
+        self.session_memory.append(tracemalloc.get_traced_memory()[1] - baseline)
+        self.session_cpu.append(time.process_time() - cpu_started)
+
+    async def run_turn(self, session: str, agent: OdooNavigationAgent, pipeline: StubPipeline, room: FakeRoom,
+                       turn: dict) -> dict:
+        args = self.args
+        text = turn["user"]
+        published = len(room.published)
+
+        speech_end = time.perf_counter()
+        agent._on_user_stopped_speaking()
+        await asyncio.sleep(args.stt_ms / 1000 + _audio_seconds(turn.get("audio")) * args.stt_rtf)
+        agent._on_transcript(
+            stt.SpeechEvent(
+                type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                alternatives=[stt.SpeechData(language="", text=text)],
+            )
+        )
+        await asyncio.sleep(args.eou_ms / 1000)
+
+        request = pipeline.chat_ctx.copy()
+        request.append(role="user", text=text)
+        pipeline.chat_ctx.append(role="user", text=text)
+        result = await agent._before_llm(pipeline, request)
+
+        tool_calls = []
+        if result is not False:
+            spec = turn.get("llm") or {}
+            await asyncio.sleep(args.llm_ms / 1000)
+            if spec.get("call"):
+                output = await getattr(agent, spec["call"])(**spec.get("args", {}))
+                tool_calls.append(spec["call"])
+                # A second completion turns the tool result into the spoken reply
+                await asyncio.sleep(args.llm_ms / 1000)
+                reply = spec.get("reply") or output
+            else:
+                reply = spec.get("reply", "Sorry, I can only help you move around Odoo.")
+            await pipeline.say(reply)
+
+        navigations = [room.page.describe(payload) for payload in room.published[published:]]
+        navigations = [navigation for navigation in navigations if navigation]
+        actual = navigations[-1] if navigations else None
+        expected = turn.get("expect")
+        return {
+            "session": session,
+            "user": text,
+            "path": "fast" if result is False else "llm",
+            "latency": pipeline.spoken_at - speech_end,
+            "tool_calls": tool_calls,
+            "expected": expected,
+            "actual": actual,
+            "correct": actual == expected,
+            "prompt_messages": len(pipeline.llm.requests[-1].messages) if result is not False else 0,
+        }
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def build_report(replay: Replay) -> dict:
+    by_path = {"all": replay.turns}
+    for turn in replay.turns:
+        by_path.setdefault(turn["path"], []).append(turn)
+    latency = {}
+    for path, turns in by_path.items():
+        values = [turn["latency"] for turn in turns]
+        latency[path] = {
+            "turns": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+        }
+    correct = sum(turn["correct"] for turn in replay.turns)
+    return {
+        "latency": latency,
+        "accuracy": correct / len(replay.turns) if replay.turns else 1.0,
+        "correct": correct,
+        "turns": len(replay.turns),
+        "mistakes": [turn for turn in replay.turns if not turn["correct"]],
+        "memory_per_session_kb": {
+            "mean": round(statistics.mean(replay.session_memory) / 1024, 1) if replay.session_memory else 0,
+            "max": round(max(replay.session_memory, default=0) / 1024, 1),
+        },
+        "cpu_per_session_ms": {
+            "mean": round(statistics.mean(replay.session_cpu) * 1000, 1) if replay.session_cpu else 0,
+            "max": round(max(replay.session_cpu, default=0) * 1000, 1),
+        },
+    }
+
+
+def print_report(report: dict):
+    print(f"{'path':<5} {'turns':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for path, stats in report["latency"].items():
+        print(f"{path:<5} {stats['turns']:>5} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+    print(f"Navigation correctness: {report['correct']}/{report['turns']} ({report['accuracy']:.0%})")
+    for turn in report["mistakes"]:
+        print(f"  [{turn['session']}] '{turn['user']}': expected {turn['expected']}, got {turn['actual']}")
+    memory = report["memory_per_session_kb"]
+    print(f"Memory per session: {memory['mean']} KB mean, {memory['max']} KB max")
+    cpu = report["cpu_per_session_ms"]
+    print(f"CPU per session: {cpu['mean']} ms mean, {cpu['max']} ms max")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fixtures", help="JSON file with menus and sessions")
+    parser.add_argument("--stt-ms", type=float, default=300, help="STT latency after end of speech")
+    parser.add_argument("--stt-rtf", type=float, default=0.1, help="Extra STT seconds per second of fixture audio")
+    parser.add_argument("--eou-ms", type=float, default=500, help="End-of-utterance delay before the turn commits")
+    parser.add_argument("--llm-ms", type=float, default=700, help="Latency of each LLM completion")
+    parser.add_argument("--tts-ms", type=float, default=250, help="Time to first audio for uncached phrases")
+    parser.add_argument("--tts-cached-ms", type=float, default=5, help="Time to first audio for cached phrases")
+    parser.add_argument("--page-ms", type=float, default=40, help="One-way data channel latency to the page")
+    parser.add_argument("--gap-ms", type=float, default=200, help="Pause between turns")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every session this many times")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--min-accuracy", type=float, default=1.0, help="Exit non-zero below this correctness")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with open(args.fixtures, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    menus = [MenuTarget(menu["xml_id"], menu["name"], menu.get("menu_id")) for menu in fixtures["menus"]]
+
+    tracemalloc.start()
+    replay = Replay(menus, args)
+    for round_number in range(args.repeat):
+        for session in fixtures["sessions"]:
+            await replay.run_session(f"{session['name']}#{round_number + 1}", session["turns"])
+    tracemalloc.stop()
+
+    report = build_report(replay)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+    return 0 if report["accuracy"] >= args.min_accuracy else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
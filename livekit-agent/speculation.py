@@ -0,0 +1,217 @@
+"""
+Speculative navigation from partial transcripts
+Opens a confidently recognized module before the user's turn is committed and corrects it if the final transcript disagrees
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from livekit.agents import stt
+
+from intents import Intent, IntentMatcher
+
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_NAVIGATION = os.getenv("SPECULATIVE_NAVIGATION", "false").lower() in ("1", "true", "yes")
+# Only exact or whole-phrase module names are acted on before the turn is committed
+SPECULATION_MIN_SCORE = float(os.getenv("SPECULATION_MIN_SCORE", "0.95"))
+# A turn still uncommitted this long after the user stopped speaking was discarded (noise, interrupted reply);
+# well above the pipeline's 0.5 s endpointing delay, so pauses within one turn are not mistaken for it
+SPECULATION_TURN_TIMEOUT = float(os.getenv("SPECULATION_TURN_TIMEOUT", "2.0"))
+
+# Intents that open an absolute target; relative ones depend on the page the committed turn starts from
+SPECULATIVE_ACTIONS = ("navigate", "home")
+
+
+def _same_intent(a: Optional[Intent], b: Optional[Intent]) -> bool:
+    if a is None or b is None:
+        return a is b
+    return a.action == b.action and a.target == b.target
+
+
+class TranscriptTap(stt.STT):
+    """Streaming STT wrapper that reports every interim and final event to a callback"""
+
+    def __init__(self, wrapped: stt.STT, on_event: Callable[[stt.SpeechEvent], None]):
+        super().__init__(capabilities=wrapped.capabilities)
+        self._wrapped = wrapped
+        self._on_event = on_event
+
+        @wrapped.on("metrics_collected")
+        def _forward_metrics(*args, **kwargs):
+            self.emit("metrics_collected", *args, **kwargs)
+
+    async def _recognize_impl(self, buffer, **kwargs) -> stt.SpeechEvent:
+        return await self._wrapped.recognize(buffer, **kwargs)
+
+    def stream(self, **kwargs) -> "_TappedSpeechStream":
+        return _TappedSpeechStream(self._wrapped.stream(**kwargs), self._on_event)
+
+
+class _TappedSpeechStream:
+    """Forwards a speech stream unchanged while passing its events to the tap"""
+
+    def __init__(self, stream: stt.SpeechStream, on_event: Callable[[stt.SpeechEvent], None]):
+        self._stream = stream
+        self._on_event = on_event
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def push_frame(self, frame):
+        self._stream.push_frame(frame)
+
+    def flush(self):
+        self._stream.flush()
+
+    def end_input(self):
+        self._stream.end_input()
+
+    async def aclose(self):
+        await self._stream.aclose()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> stt.SpeechEvent:
+        event = await self._stream.__anext__()
+        try:
+            self._on_event(event)
+        except Exception as e:
+            logger.error(f"Error in transcript tap: {e}")
+        return event
+
+
+@dataclass
+class SpeculationStats:
+    """Per-session outcome counters for speculative navigation"""
+
+    confirmed: int = 0
+    corrected: int = 0
+    rolled_back: int = 0
+    saved_seconds: float = 0.0
+
+    def summary(self) -> str:
+        attempts = self.confirmed + self.corrected + self.rolled_back
+        if not attempts:
+            return "Speculation: no attempts"
+        text = (
+            f"Speculation: {self.confirmed}/{attempts} confirmed ({self.confirmed / attempts:.0%}), "
+            f"{self.corrected} corrected, {self.rolled_back} rolled back"
+        )
+        if self.confirmed:
+            text += f", ~{self.saved_seconds / self.confirmed * 1000:.0f} ms earlier per confirmed turn"
+        return text
+
+
+class Speculator:
+    """Tracks the transcript of the current turn and navigates as soon as it names a module"""
+
+    def __init__(
+        self,
+        intents: IntentMatcher,
+        navigate: Callable[[Intent], Awaitable[None]],
+        rollback: Callable[[], Awaitable[None]],
+        min_score: float = SPECULATION_MIN_SCORE,
+        turn_timeout: float = SPECULATION_TURN_TIMEOUT,
+    ):
+        self.intents = intents
+        self.stats = SpeculationStats()
+        self._navigate = navigate
+        self._rollback = rollback
+        self._min_score = min_score
+        self._turn_timeout = turn_timeout
+        self._segments: list[str] = []
+        self._pending: Optional[Intent] = None
+        self._sent_at = 0.0
+        self._speech_ended_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _chain(self, step: Callable[[], Awaitable[None]]):
+        """Run ``step`` after the navigation already in flight, so the page sees commands in order"""
+        previous = self._task
+
+        async def run():
+            if previous is not None:
+                await previous
+            await step()
+
+        self._task = asyncio.create_task(run())
+
+    def on_speech_started(self):
+        """VAD start of speech: drop the previous turn if it was never committed"""
+        if self._speech_ended_at and time.perf_counter() - self._speech_ended_at > self._turn_timeout:
+            self.abandon()
+        self._speech_ended_at = 0.0
+
+    def on_speech_ended(self):
+        """VAD end of speech: the turn is committed within the endpointing delay or discarded"""
+        self._speech_ended_at = time.perf_counter()
+
+    def abandon(self):
+        """Forget a turn that will not be committed, rolling back the module it opened"""
+        if self._segments:
+            logger.info(f"Discarding uncommitted turn '{' '.join(self._segments)}'")
+        self._segments = []
+        if self._pending is not None:
+            self._pending = None
+            self.stats.rolled_back += 1
+            logger.info("Speculation rolled back with its discarded turn")
+            self._chain(self._rollback)
+
+    def on_transcript(self, event: stt.SpeechEvent):
+        """STT tap callback: act on the turn heard so far, final segments plus the latest interim"""
+        if event.type not in (stt.SpeechEventType.INTERIM_TRANSCRIPT, stt.SpeechEventType.FINAL_TRANSCRIPT):
+            return
+        text = event.alternatives[0].text if event.alternatives else ""
+        if event.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+            if text:
+                self._segments.append(text)
+            heard = " ".join(self._segments)
+        else:
+            heard = " ".join([*self._segments, text])
+
+        intent = self.intents.match(heard)
+        if intent is None or intent.action not in SPECULATIVE_ACTIONS:
+            return
+        if intent.score < self._min_score or _same_intent(intent, self._pending):
+            return
+        logger.info(f"Speculating on '{heard}' -> {intent.action} {intent.target.name if intent.target else ''}")
+        self._pending = intent
+        self._sent_at = time.perf_counter()
+        self._chain(lambda: self._navigate(intent))
+
+    async def resolve(self, intent: Optional[Intent]) -> bool:
+        """Reconcile the committed turn with any speculation; True if its navigation was already sent
+
+        A final "back" after a rolled-back speculation counts as sent: the rollback already restored the page.
+        """
+        pending, sent_at = self._pending, self._sent_at
+        self._segments = []
+        self._pending = None
+        self._speech_ended_at = 0.0
+        if pending is None:
+            return False
+        if self._task is not None:
+            await self._task
+
+        if _same_intent(pending, intent):
+            self.stats.confirmed += 1
+            self.stats.saved_seconds += time.perf_counter() - sent_at
+            return True
+        if intent is not None and intent.action in SPECULATIVE_ACTIONS:
+            # The fast path sends the right navigation itself
+            self.stats.corrected += 1
+            logger.info(f"Speculation corrected to {intent.action} {intent.target.name if intent.target else ''}")
+        else:
+            self.stats.rolled_back += 1
+            logger.info("Speculation rolled back")
+            await self._rollback()
+            if intent is not None and intent.action == "back":
+                # The rollback already returned to the page the user asked to go back to
+                return True
+        return False
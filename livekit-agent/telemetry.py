@@ -0,0 +1,354 @@
+"""
+Turn latency tracing and the agent's /metrics and /healthz endpoints
+Job processes record histograms and write snapshots; the worker process merges them and serves Prometheus text
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Every job runs in its own process, so metrics are shared through snapshot files
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-metrics"))
+# Port of the /metrics and /healthz server in the worker process, 0 to disable
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8080"))
+SNAPSHOT_INTERVAL = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+LAG_PROBE_INTERVAL = 0.25
+
+BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "voice_agent_span_seconds": "Duration of one stage of a voice turn",
+    "voice_agent_turn_seconds": "End of user speech to first agent audio",
+    "voice_agent_turns_total": "Committed user turns",
+    "voice_agent_jobs_total": "Jobs started",
+    "voice_agent_vad_inference_seconds_total": "Time spent in VAD inference",
+    "voice_agent_prompt_tokens_total": "Estimated prompt tokens sent to the LLM",
+    "voice_agent_navigation_retries_total": "Navigations sent again after no ack from the page",
+    "voice_agent_navigation_failures_total": "Navigations the page never acknowledged",
+    "voice_agent_loop_lag_seconds": "Recent peak event loop lag of a job process",
+    "voice_agent_cpu_seconds_total": "CPU time used by job processes since their session started",
+    "voice_agent_gated_frames_total": "Input audio frames kept from VAD and STT while the agent spoke or the user was muted",
+    "voice_agent_load": "Load reported to the LiveKit dispatcher",
+}
+
+# Gauges owned by the worker process, such as the load it reports
+worker_gauges: dict[str, float] = {}
+
+_RETIRED_FILE = "retired.json"
+
+
+def _series(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+def _split_series(series: str) -> tuple[str, str]:
+    """Split 'name{labels}' into the metric name and the label body"""
+    name, _, labels = series.partition("{")
+    return name, labels.rstrip("}")
+
+
+class Recorder:
+    """Histograms, counters and session state of this process"""
+
+    def __init__(self):
+        self.histograms: dict[str, dict] = {}
+        self.counters: dict[str, float] = {}
+        self.session: dict = {}
+        self.loop_lag = 0.0
+        self._cpu_started = 0.0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def observe(self, name: str, seconds: float, **labels):
+        histogram = self.histograms.setdefault(
+            _series(name, labels), {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        )
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+    def increment(self, name: str, value: float = 1, **labels):
+        series = _series(name, labels)
+        self.counters[series] = self.counters.get(series, 0) + value
+
+    @contextlib.contextmanager
+    def span(self, span: str, **labels):
+        """Time a block, including awaits inside it, as one turn stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("voice_agent_span_seconds", time.perf_counter() - started, span=span, **labels)
+
+    def start_session(self, room: str):
+        self.increment("voice_agent_jobs_total")
+        self._cpu_started = time.process_time()
+        self.session = {"room": room, "state": "connecting", "participant": None, "started": time.time()}
+        if self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._write_snapshots())
+            self._lag_task = asyncio.create_task(self._watch_loop_lag())
+
+    def update_session(self, **state):
+        self.session.update(state)
+        self.write_snapshot()
+
+    def cpu_seconds(self) -> float:
+        """CPU time of this process since the session started; each job runs in its own process"""
+        return time.process_time() - self._cpu_started if self.session else 0.0
+
+    def write_snapshot(self):
+        if self.session:
+            # Cumulative per process, so it sums across live and retired snapshots like any counter
+            self.counters["voice_agent_cpu_seconds_total"] = self.cpu_seconds()
+        snapshot = {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "histograms": self.histograms,
+            "counters": self.counters,
+            "session": self.session,
+            "loop_lag": self.loop_lag,
+        }
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, os.path.join(METRICS_DIR, f"{os.getpid()}.json"))
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+    async def _write_snapshots(self):
+        while True:
+            self.write_snapshot()
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+    async def _watch_loop_lag(self):
+        """Measure how late the event loop wakes up, holding peaks for a few seconds"""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = max(time.perf_counter() - started - LAG_PROBE_INTERVAL, 0.0)
+            self.loop_lag = max(lag, self.loop_lag * 0.8)
+
+
+recorder = Recorder()
+
+
+class TurnTrace:
+    """Timestamps of one user turn, from the end of speech to the first agent audio"""
+
+    def __init__(self):
+        self.marks: dict[str, float] = {}
+
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter()
+
+    def finish(self, path: str) -> Optional[dict]:
+        """Record the turn's spans and return them, or None if end of speech was never seen"""
+        marks, self.marks = self.marks, {}
+        speech_end = marks.get("speech_end")
+        if speech_end is None:
+            return None
+        spoken = time.perf_counter()
+
+        spans = {}
+        if "stt_final" in marks:
+            spans["stt_final"] = marks["stt_final"] - speech_end
+        if "committed" in marks:
+            spans["end_of_utterance"] = marks["committed"] - speech_end
+            spans["reply"] = spoken - marks["committed"]
+        for span, seconds in spans.items():
+            recorder.observe("voice_agent_span_seconds", max(seconds, 0.0), span=span)
+        total = spoken - speech_end
+        recorder.observe("voice_agent_turn_seconds", total, path=path)
+        recorder.increment("voice_agent_turns_total", path=path)
+        return {"path": path, **{span: round(seconds, 3) for span, seconds in spans.items()}, "total": round(total, 3)}
+
+
+# Worker process side
+
+
+def _merge(into: dict, snapshot: dict):
+    for series, histogram in snapshot.get("histograms", {}).items():
+        merged = into["histograms"].setdefault(series, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0})
+        merged["buckets"] = [a + b for a, b in zip(merged["buckets"], histogram["buckets"])]
+        merged["sum"] += histogram["sum"]
+        merged["count"] += histogram["count"]
+    for series, value in snapshot.get("counters", {}).items():
+        into["counters"][series] = into["counters"].get(series, 0) + value
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_collect_lock = threading.Lock()
+
+
+def collect() -> tuple[dict, list[dict]]:
+    """Merge all process snapshots; those of exited processes are folded into the retired totals"""
+    # Called from the metrics server thread and the worker's load executor
+    with _collect_lock:
+        return _collect()
+
+
+def _collect() -> tuple[dict, list[dict]]:
+    retired_path = os.path.join(METRICS_DIR, _RETIRED_FILE)
+    try:
+        with open(retired_path) as f:
+            retired = json.load(f)
+    except (OSError, ValueError):
+        retired = {"histograms": {}, "counters": {}}
+
+    live = []
+    retired_changed = False
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(METRICS_DIR):
+            if not entry.name.endswith(".json") or entry.name == _RETIRED_FILE:
+                continue
+            try:
+                with open(entry.path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if _pid_alive(snapshot.get("pid", 0)):
+                live.append(snapshot)
+            else:
+                _merge(retired, snapshot)
+                retired_changed = True
+                with contextlib.suppress(OSError):
+                    os.unlink(entry.path)
+
+    if retired_changed:
+        fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(retired, f)
+        os.replace(tmp_path, retired_path)
+
+    totals = {"histograms": {}, "counters": {}}
+    _merge(totals, retired)
+    for snapshot in live:
+        _merge(totals, snapshot)
+    return totals, live
+
+
+def active_sessions(sessions: list[dict]) -> list[dict]:
+    return [snapshot for snapshot in sessions if snapshot.get("session", {}).get("state") in ("connecting", "active")]
+
+
+def render_prometheus(totals: dict, sessions: list[dict]) -> str:
+    lines = []
+    described = set()
+
+    def describe(name: str, kind: str):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for series, histogram in sorted(totals["histograms"].items()):
+        name, labels = _split_series(series)
+        describe(name, "histogram")
+        prefix = f"{labels}," if labels else ""
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram["count"]}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram['sum']:.6f}")
+        lines.append(f"{name}_count{suffix} {histogram['count']}")
+
+    for series, value in sorted(totals["counters"].items()):
+        name, _ = _split_series(series)
+        describe(name, "counter")
+        lines.append(f"{series} {value:g}")
+
+    lines.append("# HELP voice_agent_active_jobs Jobs connected to a room")
+    lines.append("# TYPE voice_agent_active_jobs gauge")
+    lines.append(f"voice_agent_active_jobs {len(active_sessions(sessions))}")
+    for snapshot in sessions:
+        describe("voice_agent_loop_lag_seconds", "gauge")
+        lines.append(f'voice_agent_loop_lag_seconds{{pid="{snapshot["pid"]}"}} {snapshot.get("loop_lag", 0.0):.6f}')
+    for name, value in sorted(worker_gauges.items()):
+        describe(name, "gauge")
+        lines.append(f"{name} {value:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    totals, sessions = await asyncio.to_thread(collect)
+    return web.Response(text=render_prometheus(totals, sessions), content_type="text/plain")
+
+
+async def _healthz_handler(request: web.Request) -> web.Response:
+    """Healthy unless an active job has stopped updating its snapshot"""
+    _, sessions = await asyncio.to_thread(collect)
+    now = time.time()
+    jobs = []
+    stalled = 0
+    for snapshot in active_sessions(sessions):
+        age = now - snapshot.get("updated", 0)
+        if age > SNAPSHOT_INTERVAL * 3:
+            stalled += 1
+        session = snapshot["session"]
+        jobs.append({
+            "pid": snapshot["pid"],
+            "room": session.get("room"),
+            "state": session.get("state"),
+            "participant": session.get("participant"),
+            "uptime": round(now - session.get("started", now)),
+            "snapshot_age": round(age, 1),
+            "cpu_seconds": round(snapshot.get("counters", {}).get("voice_agent_cpu_seconds_total", 0.0), 1),
+        })
+    body = {"status": "stalled" if stalled else "ok", "active_jobs": len(jobs), "jobs": jobs}
+    return web.json_response(body, status=503 if stalled else 200)
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve /metrics and /healthz from a daemon thread of the worker process"""
+    if not port:
+        return
+    # Counters restart with the worker, as Prometheus expects
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(METRICS_DIR):
+            with contextlib.suppress(OSError):
+                os.unlink(entry.path)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+    def run():
+        # The worker's event loop belongs to cli.run_app, so the server gets a loop of its own
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get("/metrics", _metrics_handler)
+        app.router.add_get("/healthz", _healthz_handler)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        try:
+            loop.run_until_complete(web.TCPSite(runner, "0.0.0.0", port).start())
+        except OSError as e:
+            logger.error(f"Could not start metrics server on port {port}: {e}")
+            return
+        logger.info(f"Serving /metrics and /healthz on port {port}")
+        loop.run_forever()
+
+    threading.Thread(target=run, name="metrics-server", daemon=True).start()
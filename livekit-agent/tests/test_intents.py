@@ -0,0 +1,64 @@
+import pytest
+
+from intents import BACK_PHRASES, HOME_PHRASES, PARENT_PHRASES, WHERE_PHRASES, IntentMatcher, reply_text
+from menu_index import MenuIndex, MenuTarget, default_menu_index
+
+
+@pytest.fixture
+def matcher():
+    return IntentMatcher(default_menu_index())
+
+
+@pytest.mark.parametrize("phrase", HOME_PHRASES)
+def test_home_phrases(matcher, phrase):
+    assert matcher.match(phrase).action == "home"
+    assert matcher.match(f"go to {phrase}").action == "home"
+
+
+@pytest.mark.parametrize("phrase, action", [
+    *((phrase, "home") for phrase in HOME_PHRASES),
+    *((phrase, "where") for phrase in WHERE_PHRASES),
+    *((phrase, "back") for phrase in BACK_PHRASES),
+    *((phrase, "parent") for phrase in PARENT_PHRASES),
+])
+def test_page_relative_phrases(matcher, phrase, action):
+    assert matcher.match(phrase).action == action
+
+
+@pytest.mark.parametrize("transcript, xml_id", [
+    ("open sales", "sale.sale_menu_root"),
+    ("take me to the inventory module please", "stock.menu_stock_root"),
+    ("open settings", "base.menu_administration"),
+    ("go to accounting", "account.menu_finance"),
+    ("افتح المبيعات", "sale.sale_menu_root"),
+    ("روح على المخزون", "stock.menu_stock_root"),
+    ("افتح الإعدادات", "base.menu_administration"),
+    ("iftah mabiat", "sale.sale_menu_root"),
+    ("CRM", "crm.crm_menu_root"),
+])
+def test_navigation_commands(matcher, transcript, xml_id):
+    intent = matcher.match(transcript)
+    assert intent.action == "navigate"
+    assert intent.target.xml_id == xml_id
+
+
+@pytest.mark.parametrize("transcript", [
+    "",
+    "open",
+    "create a quotation for the new customer and email it",
+    "what is the weather like today",
+    "inventry",
+])
+def test_left_to_llm(matcher, transcript):
+    assert matcher.match(transcript) is None
+
+
+def test_settings_not_confused_with_apps():
+    index = MenuIndex([MenuTarget("base.menu_management", "Apps"), MenuTarget("base.menu_administration", "Settings")])
+    assert IntentMatcher(index).match("open settings").target.name == "Settings"
+    assert IntentMatcher(index).match("open apps").target.name == "Apps"
+
+
+def test_reply_language(matcher):
+    assert reply_text(matcher.match("open sales")) == "Opening Sales module"
+    assert reply_text(matcher.match("افتح المبيعات")) == "جاري فتح المبيعات"
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+
+from menu_index import MenuTarget
+from navigation import NAV_TOPIC, NavigationChannel, encode
+
+
+class FakeRoom:
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, callback):
+        self.handlers[event] = callback
+
+
+@pytest.fixture
+def channel():
+    channel = NavigationChannel(FakeRoom())
+    channel.identity = "user-1"
+    return channel
+
+
+def receive(channel, payload, identity="user-1"):
+    packet = SimpleNamespace(topic=NAV_TOPIC, data=payload, participant=SimpleNamespace(identity=identity))
+    channel.room.handlers["data_received"](packet)
+
+
+def test_menus_message_reports_visible_root_menus(channel):
+    reported = []
+    channel.on_menus = lambda identity, targets: reported.append((identity, targets))
+    receive(channel, encode("m", "v1", [[1, "sale.sale_menu_root", "Sales"], [2, None, "Custom App"]]))
+
+    targets = [MenuTarget("sale.sale_menu_root", "Sales", 1), MenuTarget("", "Custom App", 2)]
+    assert channel.menus["user-1"] == ("v1", targets)
+    assert reported == [("user-1", targets)]
+
+
+def test_menus_message_ignores_known_version_and_malformed_entries(channel):
+    reported = []
+    channel.on_menus = lambda identity, targets: reported.append(targets)
+    receive(channel, encode("m", "v1", [[1, "sale.sale_menu_root", "Sales"], "bad", [3, "x.y"], [None, "a.b", "A"]]))
+    receive(channel, encode("m", "v1", []))
+
+    assert reported == [[MenuTarget("sale.sale_menu_root", "Sales", 1)]]
+
+
+def test_menus_of_other_participants_are_ignored(channel):
+    receive(channel, encode("m", "v1", [[1, "sale.sale_menu_root", "Sales"]]), identity="user-2")
+    assert channel.menus == {}
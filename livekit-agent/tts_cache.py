@@ -0,0 +1,235 @@
+"""
+Content-addressed TTS cache for fixed agent phrases
+Stores synthesized PCM on disk, memory-maps it and plays it back without calling the TTS API
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from livekit import rtc
+from livekit.agents import tokenize, tts, utils
+
+from intents import detect_language
+
+logger = logging.getLogger(__name__)
+
+# Shared by every job process on the host, so a phrase is synthesized once per deployment
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-tts"))
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "64"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Prewarm must finish within the worker's process initialization timeout
+TTS_CACHE_WARM_TIMEOUT = float(os.getenv("TTS_CACHE_WARM_TIMEOUT", "6"))
+TTS_CACHE_WARM_CONCURRENCY = 8
+
+# Length of the frames cached audio is played back in
+FRAME_MS = 100
+
+
+def cache_key(text: str, voice: str, language: str, audio_format: str) -> str:
+    raw = "\x1f".join((text.strip(), voice, language, audio_format))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PhraseStore:
+    """PCM files on disk with an in-memory LRU of their memory maps"""
+
+    def __init__(
+        self,
+        directory: str = TTS_CACHE_DIR,
+        memory_items: int = TTS_CACHE_MEMORY_ITEMS,
+        max_bytes: int = TTS_CACHE_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._maps: OrderedDict[str, mmap.mmap] = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def contains(self, key: str) -> bool:
+        return key in self._maps or os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[memoryview]:
+        pcm = self._maps.get(key)
+        if pcm is not None:
+            self._maps.move_to_end(key)
+            return memoryview(pcm)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pcm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # The disk store is trimmed by mtime, so a read counts as a use
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self._maps[key] = pcm
+        if len(self._maps) > self.memory_items:
+            # Dropped rather than closed: a stream may still be playing from it
+            self._maps.popitem(last=False)
+        return memoryview(pcm)
+
+    def put(self, key: str, pcm: bytes):
+        """Atomically store a phrase; concurrent writers of the same key write identical content"""
+        if not pcm:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not store TTS phrase {key}: {e}")
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            return
+        self._trim()
+
+    def _trim(self):
+        """Delete the least recently used files once the store exceeds max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                with contextlib.suppress(OSError):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+            total -= size
+
+
+class CachedTTS(tts.TTS):
+    """Non-streaming TTS that answers pinned phrases from a PhraseStore and forwards the rest"""
+
+    def __init__(self, wrapped: tts.TTS, *, voice: str, store: Optional[PhraseStore] = None):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self.store = store or PhraseStore()
+        self.hits = 0
+        self.misses = 0
+        self._wrapped = wrapped
+        self._voice = voice
+        self._format = f"pcm_s16le_{wrapped.sample_rate}_{wrapped.num_channels}"
+        self._pinned: set[str] = set()
+        self._sentences = tokenize.basic.SentenceTokenizer()
+
+    def pin(self, phrases: Iterable[str]):
+        """Mark phrases as cacheable, as the sentences the pipeline will synthesize them in"""
+        for phrase in phrases:
+            self._pinned.update(sentence.strip() for sentence in self._sentences.tokenize(phrase) or [phrase])
+
+    def key_for(self, text: str) -> Optional[str]:
+        text = text.strip()
+        if text not in self._pinned:
+            return None
+        return cache_key(text, self._voice, detect_language(text), self._format)
+
+    def synthesize(self, text: str) -> "CachedChunkedStream":
+        return CachedChunkedStream(self, text)
+
+    async def warm(self, phrases: Iterable[str], timeout: float = TTS_CACHE_WARM_TIMEOUT) -> int:
+        """Synthesize pinned phrases missing from the store and return how many were added"""
+        self.pin(phrases)
+        missing = [text for text in self._pinned if not self.store.contains(self.key_for(text))]
+        if not missing:
+            return 0
+
+        with open(os.path.join(self.store.directory, ".warm.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already warming the same store
+                return 0
+
+            semaphore = asyncio.Semaphore(TTS_CACHE_WARM_CONCURRENCY)
+
+            async def synthesize(text: str):
+                async with semaphore:
+                    stream = self.synthesize(text)
+                    try:
+                        async for _ in stream:
+                            pass
+                    finally:
+                        await stream.aclose()
+
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(synthesize(text) for text in missing), return_exceptions=True),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("TTS cache warm-up timed out; remaining phrases are cached on first use")
+        return sum(self.store.contains(self.key_for(text)) for text in missing)
+
+    def summary(self) -> str:
+        lookups = self.hits + self.misses
+        if not lookups:
+            return "TTS cache: no pinned phrases spoken"
+        return f"TTS cache: {self.hits}/{lookups} pinned phrases played from cache ({self.hits / lookups:.0%})"
+
+    async def aclose(self):
+        await self._wrapped.aclose()
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    """Plays a cached phrase, or synthesizes it through the wrapped TTS and stores it when pinned"""
+
+    def __init__(self, cached_tts: CachedTTS, text: str):
+        super().__init__(cached_tts, text)
+        self._cached_tts = cached_tts
+
+    async def _main_task(self):
+        key = self._cached_tts.key_for(self._input_text)
+        pcm = self._cached_tts.store.get(key) if key else None
+        if pcm is not None:
+            self._cached_tts.hits += 1
+            self._play(pcm)
+            return
+        if key:
+            self._cached_tts.misses += 1
+
+        chunks = []
+        stream = self._cached_tts._wrapped.synthesize(self._input_text)
+        try:
+            async for audio in stream:
+                self._event_ch.send_nowait(audio)
+                if key:
+                    chunks.append(bytes(audio.frame.data))
+        finally:
+            await stream.aclose()
+        # Only complete syntheses get here; interrupted ones are cancelled above
+        if key and chunks:
+            self._cached_tts.store.put(key, b"".join(chunks))
+
+    def _play(self, pcm: memoryview):
+        sample_rate = self._cached_tts.sample_rate
+        num_channels = self._cached_tts.num_channels
+        frame_bytes = sample_rate * FRAME_MS // 1000 * num_channels * 2
+        request_id = utils.shortuuid()
+        for offset in range(0, len(pcm), frame_bytes):
+            chunk = bytes(pcm[offset:offset + frame_bytes])
+            frame = rtc.AudioFrame(
+                data=chunk,
+                sample_rate=sample_rate,
+                num_channels=num_channels,
+                samples_per_channel=len(chunk) // (2 * num_channels),
+            )
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, segment_id="", frame=frame))
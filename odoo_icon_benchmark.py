@@ -0,0 +1,158 @@
+"""
+Micro-benchmark for the app launcher's custom icon lookup
+Compares the linear scan the controllers used to run per menu with the trie index they build at import time
+
+Usage:
+    python3 odoo_icon_benchmark.py --names 5000
+    python3 odoo_icon_benchmark.py --names 5000 --keys 500 --json icons.json
+
+The icon mapping, _normalize_app_name and _IconNameIndex are read from main.py and main_updated.py and run as
+written, without importing Odoo. The linear scans reproduce the lookups those files had before the index,
+including the mapping rebuilt on every call. --keys adds synthetic module keys to show how each approach scales
+as more custom icons are uploaded.
+
+Results can differ on names that contain several keys: the scan returned whichever key came first in the
+mapping, the index returns the longest. The report counts those names rather than failing on them.
+"""
+
+import argparse
+import ast
+import json
+import os
+import random
+import string
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONTROLLERS = ("main.py", "main_updated.py")
+DEFINITIONS = ("CUSTOM_ICON_PATHS", "_normalize_app_name", "_IconNameIndex", "_CUSTOM_ICON_INDEX")
+# Words synthetic menu names are built from, so some contain icon keys and most do not
+WORDS = (
+    "sales", "crm", "stock", "inventory", "hr", "employees", "expenses", "purchase", "account", "website",
+    "project", "helpdesk", "fleet", "quality", "events", "survey", "lunch", "repairs", "rental", "planning",
+)
+
+
+def load_definitions(filename: str) -> dict:
+    """Run only the icon lookup definitions of a controller file, which otherwise needs Odoo to import"""
+    path = os.path.join(HERE, filename)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in DEFINITIONS:
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id in DEFINITIONS for target in node.targets
+        ):
+            nodes.append(node)
+    namespace = {}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), path, "exec"), namespace)
+    return namespace
+
+
+def linear_scan(filename: str):
+    """The per-call lookup of ``filename`` before the index"""
+    if filename == "main.py":
+        def scan(mapping, app_name):
+            icon_mapping = dict(mapping)
+            app_name_lower = app_name.lower()
+            for key, path in icon_mapping.items():
+                if key in app_name_lower:
+                    return path
+            return None
+    else:
+        def scan(mapping, app_name):
+            icon_mapping = dict(mapping)
+            app_name_lower = app_name.lower().replace(' ', '_')
+            if app_name_lower in icon_mapping:
+                return icon_mapping[app_name_lower]
+            for key, path in icon_mapping.items():
+                if key in app_name_lower or app_name_lower in key:
+                    return path
+            return None
+    return scan
+
+
+def synthetic_names(count: int, rng: random.Random) -> list[str]:
+    """Menu names of one to four words, a third of them with a random suffix as custom modules have"""
+    names = []
+    for _ in range(count):
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        if rng.random() < 0.33:
+            words.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+        names.append(" ".join(word.title() for word in words))
+    return names
+
+
+def synthetic_keys(mapping: dict, count: int, rng: random.Random) -> dict:
+    """The mapping plus ``count`` extra module keys, as if that many custom icons were uploaded"""
+    extended = dict(mapping)
+    while len(extended) < len(mapping) + count:
+        key = "x_" + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+        extended[key] = f"/app_launcher_home/static/src/img/icons/{key}.svg"
+    return extended
+
+
+def per_lookup_us(resolve, names: list[str], repeat: int) -> float:
+    """Best of ``repeat`` passes over all names, in microseconds per lookup"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for name in names:
+            resolve(name)
+        best = min(best, time.perf_counter() - started)
+    return best / len(names) * 1e6
+
+
+def benchmark(filename: str, names: list[str], keys: int, repeat: int, seed: int) -> dict:
+    namespace = load_definitions(filename)
+    mapping = synthetic_keys(namespace["CUSTOM_ICON_PATHS"], keys, random.Random(seed))
+    index_kwargs = {"match_fragments": True} if filename == "main_updated.py" else {}
+
+    started = time.perf_counter()
+    index = namespace["_IconNameIndex"](mapping, **index_kwargs)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    scan = linear_scan(filename)
+    scan_us = per_lookup_us(lambda name: scan(mapping, name), names, repeat)
+    index_us = per_lookup_us(index.resolve, names, repeat)
+    differing = sum(1 for name in names if scan(mapping, name) != index.resolve(name))
+    return {
+        "keys": len(mapping),
+        "names": len(names),
+        "index_build_ms": round(build_ms, 3),
+        "linear_us": round(scan_us, 3),
+        "index_us": round(index_us, 3),
+        "speedup": round(scan_us / index_us, 2),
+        "differing": differing,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=5000, help="Synthetic menu names to resolve")
+    parser.add_argument("--keys", type=int, default=0, help="Synthetic icon keys added to the mapping")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes per approach; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    names = synthetic_names(args.names, random.Random(args.seed))
+    report = {filename: benchmark(filename, names, args.keys, args.repeat, args.seed) for filename in CONTROLLERS}
+
+    print(f"{'controller':16} {'keys':>6} {'linear us':>10} {'index us':>10} {'speedup':>8} {'build ms':>9} {'differ':>7}")
+    for filename, row in report.items():
+        print(
+            f"{filename:16} {row['keys']:>6} {row['linear_us']:>10.2f} {row['index_us']:>10.2f} "
+            f"{row['speedup']:>7.1f}x {row['index_build_ms']:>9.2f} {row['differing']:>7}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""
+Load test for the app launcher and voice agent routes
+Runs scripted scenarios against a local Odoo and reports throughput, p50/p95/p99 latency and SQL queries per request
+
+Usage:
+    # Start a throwaway Odoo on a local Postgres database, with test users and a large menu tree
+    python3 odoo_load_test.py --odoo-bin odoo-bin --odoo-args "--addons-path=... --db_host=localhost" \
+        --db loadtest --setup --users 50 --menus 200 --json baseline.json
+
+    # Compare the next release against that baseline
+    python3 odoo_load_test.py --odoo-bin odoo-bin --odoo-args "..." --db loadtest --compare baseline.json
+
+Scenarios:
+    launcher    every user opens /web/app_launcher and fetches /web/app_launcher/data
+    reconnect   every user asks for a LiveKit token and the module list at the same instant, as after an outage
+    menus       get_modules and the launcher data without revalidation, sized by --menus extra root menus
+
+LiveKit is never contacted: tokens are signed locally by the controller. A server started with --odoo-bin gets
+stand-in LiveKit credentials, and every token it issues is checked against them. SQL query counts come from
+Odoo's werkzeug request log (query count, query time, remaining time), read from the log file of a server
+started here or the one named by --odoo-log.
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import http.cookiejar
+import json
+import os
+import re
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+SCENARIOS = ("launcher", "reconnect", "menus")
+USER_LOGIN_PREFIX = "loadtest_"
+MENU_NAME_PREFIX = "Load Test App "
+# Stand-in LiveKit API key and secret; fixed so tokens cached in Redis by an earlier run still verify
+LIVEKIT_STANDIN = ("loadtest", "loadtest-livekit-secret-not-for-production")
+
+# Odoo appends "<queries> <query seconds> <other seconds>" to each werkzeug request line
+_REQUEST_LOG = re.compile(r'"(?:GET|POST) ([^ ?"]+)[^"]*" (\d{3}) \S+ (\d+) ([\d.]+) ([\d.]+)')
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[int(pct) - 1]
+
+
+class Client:
+    """One browser session: its own cookies, logged in as one user"""
+
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def get(self, path: str) -> tuple[int, bytes]:
+        try:
+            with self.opener.open(self.base_url + path, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def call(self, path: str, params: dict) -> tuple[int, dict]:
+        """JSON-RPC call; returns the HTTP status and the result, or the error as {"error": ...}"""
+        body = json.dumps({"jsonrpc": "2.0", "method": "call", "params": params, "id": 1}).encode()
+        http_request = urllib.request.Request(
+            self.base_url + path, data=body, headers={"Content-Type": "application/json"}
+        )
+        try:
+            with self.opener.open(http_request, timeout=self.timeout) as response:
+                status, payload = response.status, json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            return e.code, {"error": e.reason}
+        if "error" in payload:
+            return status, {"error": payload["error"].get("data", {}).get("message") or payload["error"]}
+        return status, payload.get("result")
+
+    def login(self, db: str, login: str, password: str):
+        status, result = self.call("/web/session/authenticate", {"db": db, "login": login, "password": password})
+        if status != 200 or not isinstance(result, dict) or not result.get("uid"):
+            raise SystemExit(f"Could not log in as {login}: {result}")
+
+
+class Stats:
+    """Latency and outcome of every request, per scenario and route"""
+
+    def __init__(self):
+        self.latency: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self.errors: dict[tuple[str, str], int] = defaultdict(int)
+        self.rejected: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, scenario: str, route: str, seconds: float, error: bool = False, rejected: bool = False):
+        with self._lock:
+            self.latency[scenario, route].append(seconds)
+            if error:
+                self.errors[scenario, route] += 1
+            if rejected:
+                self.rejected[scenario, route] += 1
+
+    def fail(self, scenario: str, route: str):
+        """Count a response that arrived in time but was wrong"""
+        with self._lock:
+            self.errors[scenario, route] += 1
+
+
+def _jwt_valid(token: str, key: str, secret: str) -> bool:
+    """HS256 signature and issuer check for a LiveKit access token"""
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return False
+    given = base64.urlsafe_b64decode(signature + "=" * (-len(signature) % 4))
+    return hmac.compare_digest(expected, given) and claims.get("iss") == key
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.stats = Stats()
+        self.livekit = None
+        self.clients: list[Client] = []
+
+    def timed(self, scenario: str, route: str, request):
+        started = time.perf_counter()
+        try:
+            status, result = request()
+        except OSError:
+            self.stats.record(scenario, route, time.perf_counter() - started, error=True)
+            return None
+        elapsed = time.perf_counter() - started
+        rejected = isinstance(result, dict) and "retry_after" in result
+        error = status >= 400 or (isinstance(result, dict) and "error" in result and not rejected)
+        self.stats.record(scenario, route, elapsed, error=error, rejected=rejected)
+        return None if error or rejected else result
+
+    # Scenarios
+
+    def launcher(self, client: Client):
+        for _ in range(self.args.iterations):
+            self.timed("launcher", "/web/app_launcher", lambda: client.get("/web/app_launcher"))
+            self.timed("launcher", "/web/app_launcher/data", lambda: client.get("/web/app_launcher/data"))
+
+    def reconnect(self, client: Client, barrier: threading.Barrier):
+        for _ in range(self.args.iterations):
+            barrier.wait()
+            token = self.timed("reconnect", "/voice_agent/get_token", lambda: client.call("/voice_agent/get_token", {}))
+            if token and self.livekit and not _jwt_valid(token.get("token", ""), *self.livekit):
+                self.stats.fail("reconnect", "/voice_agent/get_token")
+            self.timed("reconnect", "/voice_agent/get_modules", lambda: client.call("/voice_agent/get_modules", {}))
+
+    def menus(self, client: Client):
+        for _ in range(self.args.iterations):
+            modules = self.timed(
+                "menus", "/voice_agent/get_modules", lambda: client.call("/voice_agent/get_modules", {})
+            )
+            if modules and len(modules.get("modules", [])) < self.args.menus:
+                # Run with --setup, or lower --menus to the tree the database has
+                self.stats.fail("menus", "/voice_agent/get_modules")
+            self.timed("menus", "/web/app_launcher/data", lambda: client.get("/web/app_launcher/data"))
+
+    def run_scenario(self, name: str) -> tuple[float, tuple[int, int]]:
+        """Run one scenario with every client at once; returns its wall time and the log span it wrote"""
+        log_start = _log_size(self.args.odoo_log)
+        barrier = threading.Barrier(len(self.clients))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as pool:
+            if name == "reconnect":
+                futures = [pool.submit(self.reconnect, client, barrier) for client in self.clients]
+            else:
+                futures = [pool.submit(getattr(self, name), client) for client in self.clients]
+            for future in futures:
+                future.result()
+        wall = time.perf_counter() - started
+        # Let the server flush its request log
+        time.sleep(0.5)
+        return wall, (log_start, _log_size(self.args.odoo_log))
+
+
+def _log_size(path: Optional[str]) -> int:
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def query_counts(path: Optional[str], span: tuple[int, int]) -> dict[str, list[int]]:
+    """SQL queries per request by route, from the part of the Odoo log a scenario wrote"""
+    counts: dict[str, list[int]] = defaultdict(list)
+    if not path:
+        return counts
+    with open(path, "rb") as f:
+        f.seek(span[0])
+        text = f.read(span[1] - span[0]).decode("utf-8", "replace")
+    for match in _REQUEST_LOG.finditer(text):
+        counts[match.group(1)].append(int(match.group(3)))
+    return counts
+
+
+# Test data, created over JSON-RPC as the admin user
+
+
+def _execute(admin: Client, model: str, method: str, *args, **kwargs):
+    status, result = admin.call(
+        "/web/dataset/call_kw", {"model": model, "method": method, "args": list(args), "kwargs": kwargs}
+    )
+    if status != 200 or (isinstance(result, dict) and "error" in result):
+        raise SystemExit(f"{model}.{method} failed: {result}")
+    return result
+
+
+def setup_data(admin: Client, users: int, menus: int, password: str):
+    """Create or reset the test users and extra root menus"""
+    group = _execute(admin, "ir.model.data", "search_read",
+                     [("module", "=", "base"), ("name", "=", "group_user")], ["res_id"])[0]["res_id"]
+    existing = {
+        user["login"]: user["id"]
+        for user in _execute(admin, "res.users", "search_read",
+                             [("login", "=like", f"{USER_LOGIN_PREFIX}%")], ["login"], context={"active_test": False})
+    }
+    for index in range(users):
+        login = f"{USER_LOGIN_PREFIX}{index}"
+        values = {"password": password, "active": True}
+        if login in existing:
+            _execute(admin, "res.users", "write", [existing[login]], values)
+        else:
+            _execute(admin, "res.users", "create",
+                     {**values, "name": f"Load Test {index}", "login": login, "groups_id": [(6, 0, [group])]})
+
+    # Root menus without an action are hidden, so every test app opens the contacts list
+    action = _execute(admin, "ir.model.data", "search_read",
+                      [("module", "=", "base"), ("name", "=", "action_partner_form")], ["res_id"])[0]["res_id"]
+    have = _execute(admin, "ir.ui.menu", "search_count", [("name", "=like", f"{MENU_NAME_PREFIX}%")])
+    for index in range(have, menus):
+        _execute(admin, "ir.ui.menu", "create", {
+            "name": f"{MENU_NAME_PREFIX}{index}",
+            "parent_id": False,
+            "sequence": 1000 + index,
+            "action": f"ir.actions.act_window,{action}",
+        })
+    print(f"Test data: {users} users, {max(have, menus)} extra root menus")
+
+
+def teardown_data(admin: Client):
+    menus = _execute(admin, "ir.ui.menu", "search", [("name", "=like", f"{MENU_NAME_PREFIX}%")])
+    if menus:
+        _execute(admin, "ir.ui.menu", "unlink", menus)
+    users = _execute(admin, "res.users", "search", [("login", "=like", f"{USER_LOGIN_PREFIX}%")])
+    if users:
+        _execute(admin, "res.users", "write", users, {"active": False})
+    print(f"Removed {len(menus)} test menus and archived {len(users)} test users")
+
+
+def start_server(args: argparse.Namespace, livekit: tuple[str, str]) -> subprocess.Popen:
+    """Start Odoo with a request log to read query counts from and stand-in LiveKit credentials"""
+    port = args.url.rsplit(":", 1)[-1].split("/")[0]
+    env = dict(os.environ, LIVEKIT_URL="ws://127.0.0.1:7880", LIVEKIT_API_KEY=livekit[0], LIVEKIT_API_SECRET=livekit[1])
+    command = [
+        *shlex.split(args.odoo_bin), *shlex.split(args.odoo_args),
+        f"--database={args.db}", f"--http-port={port}", f"--logfile={args.odoo_log}",
+        "--log-handler=werkzeug:INFO", "--max-cron-threads=0",
+    ]
+    server = subprocess.Popen(command, env=env)
+    probe = Client(args.url, timeout=2)
+    deadline = time.monotonic() + args.start_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Odoo exited with {server.returncode}; see {args.odoo_log}")
+        try:
+            if probe.get("/web/health")[0] == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise SystemExit(f"Odoo did not answer /web/health within {args.start_timeout:.0f} s")
+
+
+def build_report(test: LoadTest, walls: dict[str, float], queries: dict[str, dict[str, list[int]]]) -> dict:
+    report = {}
+    for (scenario, route), latencies in sorted(test.stats.latency.items()):
+        counts = queries.get(scenario, {}).get(route, [])
+        report.setdefault(scenario, {})[route] = {
+            "requests": len(latencies),
+            "errors": test.stats.errors[scenario, route],
+            "rejected": test.stats.rejected[scenario, route],
+            "throughput": round(len(latencies) / walls[scenario], 1) if walls.get(scenario) else None,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "queries_per_request": round(statistics.mean(counts), 1) if counts else None,
+            "max_queries": max(counts) if counts else None,
+        }
+    return report
+
+
+def print_report(report: dict, baseline: Optional[dict]):
+    print(
+        f"{'scenario':<10} {'route':<26} {'reqs':>5} {'err':>4} {'429':>4} {'req/s':>7} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'sql/req':>7}"
+    )
+    for scenario, routes in report.items():
+        for route, row in routes.items():
+            queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:g}"
+            line = (
+                f"{scenario:<10} {route:<26} {row['requests']:>5} {row['errors']:>4} {row['rejected']:>4} "
+                f"{row['throughput'] or 0:>7.1f} {row['p50_ms']:>7.1f} {row['p95_ms']:>7.1f} {row['p99_ms']:>7.1f} "
+                f"{queries:>7}"
+            )
+            before = (baseline or {}).get(scenario, {}).get(route)
+            if before:
+                line += f"  p95 {_change(before['p95_ms'], row['p95_ms'])}"
+                if before.get("queries_per_request") is not None and row["queries_per_request"] is not None:
+                    line += f", sql {_change(before['queries_per_request'], row['queries_per_request'])}"
+            print(line)
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before:+.0%}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8069", help="Odoo base URL")
+    parser.add_argument("--db", required=True, help="Database to test against")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios, in order")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent users, each with its own session")
+    parser.add_argument("--iterations", type=int, default=5, help="Scenario steps per user")
+    parser.add_argument("--menus", type=int, default=100, help="Extra root menus created by --setup")
+    parser.add_argument("--password", default="loadtest", help="Password of the test users")
+    parser.add_argument("--admin-login", default="admin")
+    parser.add_argument("--admin-password", default=os.getenv("ODOO_ADMIN_PASSWORD", "admin"))
+    parser.add_argument("--setup", action="store_true", help="Create the test users and menus first")
+    parser.add_argument("--teardown", action="store_true", help="Remove the test users and menus afterwards")
+    parser.add_argument("--odoo-bin", help="Start this Odoo executable for the run instead of using a running one")
+    parser.add_argument("--odoo-args", default="", help="Extra arguments for --odoo-bin")
+    parser.add_argument("--odoo-log", help="Odoo log file to read SQL query counts from")
+    parser.add_argument("--start-timeout", type=float, default=120.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--json", help="Write the report to this file, as the baseline for --compare")
+    parser.add_argument("--compare", help="Baseline report to show p95 and query count changes against")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    test = LoadTest(args)
+    server = None
+    if args.odoo_bin:
+        args.odoo_log = args.odoo_log or tempfile.mkstemp(prefix="odoo-load-test-", suffix=".log")[1]
+        test.livekit = LIVEKIT_STANDIN
+        server = start_server(args, test.livekit)
+    try:
+        admin = Client(args.url, args.timeout)
+        admin.login(args.db, args.admin_login, args.admin_password)
+        if args.setup:
+            setup_data(admin, args.users, args.menus, args.password)
+
+        for index in range(args.users):
+            client = Client(args.url, args.timeout)
+            client.login(args.db, f"{USER_LOGIN_PREFIX}{index}", args.password)
+            test.clients.append(client)
+
+        walls, queries = {}, {}
+        for name in scenarios:
+            walls[name], span = test.run_scenario(name)
+            queries[name] = query_counts(args.odoo_log, span)
+
+        if args.teardown:
+            teardown_data(admin)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    report = build_report(test, walls, queries)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(row["errors"] for routes in report.values() for row in routes.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Odoo worker, memory and connection pool settings sized to the container
+Reads the cgroup CPU quota and memory limit and the PostgreSQL max_connections, and explains every choice
+
+Any setting can be pinned with its environment variable: WORKERS, MAX_CRON_THREADS, DB_MAXCONN,
+LIMIT_MEMORY_SOFT and LIMIT_MEMORY_HARD (bytes). ODOO_CPUS and ODOO_MEMORY_MB override what is detected, and
+ODOO_WORKER_RSS_MB the resident memory workers are counted at.
+
+Usage:
+    python3 odoo_sizing.py [--max-connections N]
+"""
+
+import argparse
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+MIB = 1024 * 1024
+
+# Left to the OS, the Odoo master process and the gevent (longpolling) worker
+MEMORY_RESERVED = 384 * MIB
+# Share of the container limit Odoo processes may use, the rest absorbs page cache and spikes
+MEMORY_USABLE_FRACTION = 0.9
+# Resident memory of a busy worker; Odoo processes typically settle at 150-300 MiB, reports and imports go higher
+WORKER_RSS = int(float(os.getenv("ODOO_WORKER_RSS_MB", "256")) * MIB)
+# Odoo compares limit_memory_* with each worker's virtual size (VMS), which runs well above its RSS, so the limits
+# stay at Odoo's defaults instead of following the container: lower ones recycle workers after nearly every request
+LIMIT_MEMORY_SOFT = 2048 * MIB
+LIMIT_MEMORY_HARD = 2560 * MIB
+
+# Connections kept free for superusers, the voice agent, backups and psql sessions
+PG_RESERVED_CONNECTIONS = int(os.getenv("PG_RESERVED_CONNECTIONS", "10"))
+PG_DEFAULT_MAX_CONNECTIONS = 100
+# A prefork worker serves one request at a time; a few connections cover its cursors and the bus
+MIN_DB_MAXCONN = 2
+MAX_DB_MAXCONN = 16
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def detect_cpus() -> tuple[float, str]:
+    """CPUs available to the container and where that number came from"""
+    if os.getenv("ODOO_CPUS"):
+        return float(os.environ["ODOO_CPUS"]), "ODOO_CPUS"
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")
+    if cpu_max and not cpu_max.startswith("max"):
+        quota, period = cpu_max.split()
+        return int(quota) / int(period), "cgroup v2 cpu.max"
+    # cgroup v1: a quota of -1 means unlimited
+    quota, period = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us"), _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period), "cgroup v1 cfs quota"
+    return float(len(os.sched_getaffinity(0))), "CPU affinity (no cgroup quota)"
+
+
+def detect_memory() -> tuple[int, str]:
+    """Bytes of memory available to the container and where that number came from"""
+    if os.getenv("ODOO_MEMORY_MB"):
+        return int(float(os.environ["ODOO_MEMORY_MB"]) * MIB), "ODOO_MEMORY_MB"
+    host = None
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        if line.startswith("MemTotal:"):
+            host = int(line.split()[1]) * 1024
+    memory_max = _read("/sys/fs/cgroup/memory.max")
+    if memory_max and memory_max != "max":
+        return int(memory_max), "cgroup v2 memory.max"
+    # cgroup v1 reports "unlimited" as a number near 2**63
+    limit = _read("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    if limit and (host is None or int(limit) < host):
+        return int(limit), "cgroup v1 memory.limit_in_bytes"
+    return host or 2048 * MIB, "host MemTotal (no cgroup limit)"
+
+
+@dataclass
+class Sizing:
+    workers: int
+    max_cron_threads: int
+    db_maxconn: int
+    limit_memory_soft: int
+    limit_memory_hard: int
+    reasons: list[str] = field(default_factory=list)
+
+    def environ(self) -> dict[str, str]:
+        """Values for the odoo.conf.template placeholders"""
+        return {
+            "WORKERS": str(self.workers),
+            "MAX_CRON_THREADS": str(self.max_cron_threads),
+            "DB_MAXCONN": str(self.db_maxconn),
+            "LIMIT_MEMORY_SOFT": str(self.limit_memory_soft),
+            "LIMIT_MEMORY_HARD": str(self.limit_memory_hard),
+        }
+
+
+def _override(name: str) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    return int(value) if value else None
+
+
+def plan(max_connections: Optional[int] = None) -> Sizing:
+    """Work out the settings, honouring explicit overrides"""
+    reasons = []
+    cpus, cpu_source = detect_cpus()
+    memory, memory_source = detect_memory()
+    reasons.append(f"{cpus:g} CPUs ({cpu_source}), {memory // MIB} MiB memory ({memory_source})")
+
+    budget = int(memory * MEMORY_USABLE_FRACTION) - MEMORY_RESERVED
+    reasons.append(
+        f"{max(budget, 0) // MIB} MiB for workers: {MEMORY_USABLE_FRACTION:.0%} of the limit "
+        f"minus {MEMORY_RESERVED // MIB} MiB for the master and gevent processes"
+    )
+
+    max_cron_threads = _override("MAX_CRON_THREADS")
+    if max_cron_threads is None:
+        max_cron_threads = 2 if cpus >= 4 and budget >= 8 * WORKER_RSS else 1
+        reasons.append(
+            f"max_cron_threads = {max_cron_threads}: a second cron worker from 4 CPUs "
+            f"and {8 * WORKER_RSS // MIB} MiB for workers"
+        )
+    else:
+        reasons.append(f"max_cron_threads = {max_cron_threads} (MAX_CRON_THREADS)")
+
+    workers = _override("WORKERS")
+    if workers is None:
+        by_cpu = math.floor(cpus * 2) + 1
+        by_memory = max(budget // WORKER_RSS - max_cron_threads, 1)
+        workers = max(min(by_cpu, by_memory), 1)
+        reasons.append(
+            f"workers = {workers}: min of {by_cpu} by CPU (2 per CPU + 1) and {by_memory} by memory "
+            f"(each process resident at about {WORKER_RSS // MIB} MiB, ODOO_WORKER_RSS_MB)"
+        )
+    else:
+        reasons.append(f"workers = {workers} (WORKERS)")
+
+    processes = max(workers, 1) + max_cron_threads
+    if processes * WORKER_RSS > budget:
+        reasons.append(
+            f"warning: {processes} processes at {WORKER_RSS // MIB} MiB resident need "
+            f"{processes * WORKER_RSS // MIB} MiB, more than the {max(budget, 0) // MIB} MiB budget; "
+            f"expect OOM kills under load"
+        )
+
+    limit_memory_soft = _override("LIMIT_MEMORY_SOFT")
+    if limit_memory_soft is None:
+        limit_memory_soft = LIMIT_MEMORY_SOFT
+        reasons.append(
+            f"limit_memory_soft = {limit_memory_soft // MIB} MiB: Odoo's default, checked against virtual size, "
+            f"not resident memory"
+        )
+    else:
+        reasons.append(f"limit_memory_soft = {limit_memory_soft // MIB} MiB (LIMIT_MEMORY_SOFT)")
+
+    limit_memory_hard = _override("LIMIT_MEMORY_HARD")
+    if limit_memory_hard is None:
+        # Keep Odoo's gap over the soft limit when that is pinned higher
+        limit_memory_hard = max(LIMIT_MEMORY_HARD, limit_memory_soft + LIMIT_MEMORY_HARD - LIMIT_MEMORY_SOFT)
+        reasons.append(
+            f"limit_memory_hard = {limit_memory_hard // MIB} MiB: Odoo's default, or "
+            f"{(LIMIT_MEMORY_HARD - LIMIT_MEMORY_SOFT) // MIB} MiB over a higher soft limit"
+        )
+    else:
+        reasons.append(f"limit_memory_hard = {limit_memory_hard // MIB} MiB (LIMIT_MEMORY_HARD)")
+    if limit_memory_hard <= limit_memory_soft:
+        reasons.append("warning: limit_memory_hard is not above limit_memory_soft; workers are killed mid-request")
+
+    db_maxconn = _override("DB_MAXCONN")
+    if max_connections is None:
+        max_connections = PG_DEFAULT_MAX_CONNECTIONS
+        reasons.append(f"PostgreSQL max_connections unknown, assuming {max_connections}")
+    # Every worker, cron worker, the gevent worker and the master keep their own pool
+    pools = processes + 2
+    available = max_connections - PG_RESERVED_CONNECTIONS
+    if db_maxconn is None:
+        db_maxconn = min(max(available // pools, MIN_DB_MAXCONN), MAX_DB_MAXCONN)
+        reasons.append(
+            f"db_maxconn = {db_maxconn}: ({max_connections} max_connections - {PG_RESERVED_CONNECTIONS} reserved) "
+            f"over {pools} pools, within {MIN_DB_MAXCONN}-{MAX_DB_MAXCONN}"
+        )
+    else:
+        reasons.append(f"db_maxconn = {db_maxconn} (DB_MAXCONN)")
+    if db_maxconn * pools > available:
+        reasons.append(
+            f"warning: {pools} pools x {db_maxconn} connections = {db_maxconn * pools}, "
+            f"more than the {available} PostgreSQL allows after reservations"
+        )
+
+    return Sizing(workers, max_cron_threads, db_maxconn, limit_memory_soft, limit_memory_hard, reasons)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-connections", type=int, help="PostgreSQL max_connections")
+    args = parser.parse_args()
+    sizing = plan(args.max_connections)
+    for reason in sizing.reasons:
+        print(reason)
+    for name, value in sizing.environ().items():
+        print(f"{name}={value}")
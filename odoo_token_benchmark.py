@@ -0,0 +1,167 @@
+"""
+Signing throughput benchmark for the voice agent's LiveKit tokens
+Measures tokens served per second by the controller's token path, minting every time and with the Redis cache
+
+Usage:
+    python3 odoo_token_benchmark.py --redis-url redis://localhost:6379/15
+    python3 odoo_token_benchmark.py --requests 20000 --threads 8 --users 200 --json tokens.json
+
+The controller's _mint_token and _get_token_payload are read from the addon with ast and run as written, without
+importing Odoo; the current user and database they read from the request are supplied here. Modes:
+    mint        VOICE_AGENT_ROOM_REUSE=0: every request signs a new token for a new room
+    cached      default timestamped rooms, cache primed: every request is a Redis GET
+    cold        default timestamped rooms, cache flushed before each pass: the first request per user signs and
+                stores its token, the rest hit the cache
+--stable-room runs the cached modes with VOICE_AGENT_STABLE_ROOM on instead; they cost the same.
+
+Every mode needs the livekit-api package; the cached modes also need redis and a Redis server. Use a scratch database
+number, since each pass deletes the voice_agent:token:* keys of the benchmark database name.
+"""
+
+import argparse
+import ast
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONTROLLER = os.path.join(HERE, "custom_addons", "odoo_voice_agent", "controllers", "main.py")
+METHODS = ("_mint_token", "_get_token_payload")
+MODES = ("mint", "cached", "cold")
+BENCHMARK_DB = "token_benchmark"
+# Stand-in LiveKit credentials; tokens are only signed, never sent to LiveKit
+LIVEKIT_STANDIN = ("benchmark", "benchmark-livekit-secret-not-for-production")
+
+
+def load_token_path(redis_client, stable_room: bool, room_reuse: int):
+    """The controller's token methods, bound to this process's request, Redis client and room settings"""
+    from livekit import api
+
+    try:
+        import redis
+    except ImportError:
+        redis = None
+
+    with open(CONTROLLER, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=CONTROLLER)
+    controller = next(
+        node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == "VoiceAgentController"
+    )
+    methods = [node for node in controller.body if isinstance(node, ast.FunctionDef) and node.name in METHODS]
+    namespace = {
+        "api": api,
+        "redis": redis,
+        "datetime": datetime,
+        "json": json,
+        "os": os,
+        "time": time,
+        "_logger": logging.getLogger("token_benchmark"),
+        "_get_redis": lambda: redis_client,
+        "TOKEN_TTL": int(os.getenv("VOICE_AGENT_TOKEN_TTL", 3600)),
+        "TOKEN_REFRESH_MARGIN": int(os.getenv("VOICE_AGENT_TOKEN_REFRESH_MARGIN", 300)),
+        "TOKEN_STABLE_ROOM": stable_room,
+        "TOKEN_ROOM_REUSE": room_reuse,
+        # Odoo's request is per thread, like this one
+        "request": type("Request", (threading.local,), {"db": BENCHMARK_DB, "env": None})(),
+    }
+    exec(compile(ast.Module(body=methods, type_ignores=[]), CONTROLLER, "exec"), namespace)
+    controller_type = type("TokenPath", (), {name: namespace[name] for name in METHODS})
+    return controller_type(), namespace["request"]
+
+
+def run_pass(mode: str, args: argparse.Namespace, redis_client) -> dict:
+    cached = mode != "mint"
+    controller, request = load_token_path(
+        redis_client if cached else None,
+        cached and args.stable_room,
+        int(os.getenv("VOICE_AGENT_ROOM_REUSE", 300)) if cached else 0,
+    )
+    users = [SimpleNamespace(id=uid, name=f"Benchmark User {uid}") for uid in range(1, args.users + 1)]
+    if mode == "cached":
+        for user in users:
+            request.env = SimpleNamespace(user=user)
+            controller._get_token_payload()
+
+    latencies = []
+
+    def serve(i: int):
+        # Each thread stands for one Odoo worker serving whichever user comes next
+        user = users[i % len(users)]
+        started = time.perf_counter()
+        request.env = SimpleNamespace(user=user)
+        payload = controller._get_token_payload()
+        latencies.append(time.perf_counter() - started)
+        return payload["room"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        rooms = set(pool.map(serve, range(args.requests)))
+    wall = time.perf_counter() - started
+    return {
+        "requests": args.requests,
+        "tokens_per_second": round(args.requests / wall, 1),
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(statistics.quantiles(latencies, n=100)[98] * 1e6, 1),
+        "distinct_rooms": len(rooms),
+    }
+
+
+def flush(redis_client):
+    keys = list(redis_client.scan_iter(f"voice_agent:token:{BENCHMARK_DB}:*"))
+    if keys:
+        redis_client.delete(*keys)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes, in order")
+    parser.add_argument("--requests", type=int, default=5000, help="Token requests per pass")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users the requests cycle through")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent requests, as Odoo worker threads")
+    parser.add_argument("--stable-room", action="store_true", help="Cache stable per-user rooms in the cached modes")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    os.environ["LIVEKIT_API_KEY"], os.environ["LIVEKIT_API_SECRET"] = LIVEKIT_STANDIN
+
+    redis_client = None
+    if any(mode != "mint" for mode in modes):
+        import redis
+
+        redis_client = redis.Redis.from_url(args.redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        redis_client.ping()
+
+    report = {}
+    for mode in modes:
+        if redis_client is not None:
+            flush(redis_client)
+        report[mode] = run_pass(mode, args, redis_client)
+    if redis_client is not None:
+        flush(redis_client)
+
+    print(f"{'mode':8} {'tokens/s':>10} {'p50 us':>9} {'p99 us':>9} {'rooms':>7}")
+    for mode, row in report.items():
+        print(
+            f"{mode:8} {row['tokens_per_second']:>10.1f} {row['p50_us']:>9.1f} {row['p99_us']:>9.1f} "
+            f"{row['distinct_rooms']:>7}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Minimal Odoo stand-in for the app launcher controllers (main.py, main_updated.py)
+
+Only what the controllers touch is provided: http.Controller and route, the request proxy, str2bool, and an
+ormcache that, like Odoo's, keeps entries in the registry of the model passed first and is emptied by
+registry.clear_cache(). The ir.ui.menu model counts the ORM calls that reach the database, so tests can check
+how the number of queries grows with the number of apps.
+"""
+
+import functools
+import importlib
+import inspect
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ormcache(*arg_names):
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            key = (func.__module__, func.__qualname__, *(arguments[name] for name in arg_names))
+            cache = args[0].pool.cache
+            if key not in cache:
+                cache[key] = func(*args, **kwargs)
+            return cache[key]
+
+        return wrapper
+    return decorator
+
+
+def _install_odoo():
+    odoo = types.ModuleType("odoo")
+    http = types.ModuleType("odoo.http")
+    tools = types.ModuleType("odoo.tools")
+    http.Controller = type("Controller", (), {})
+    http.route = lambda *args, **kwargs: (lambda method: method)
+    http.request = SimpleNamespace()
+    tools.ormcache = _ormcache
+    tools.str2bool = lambda value, default=None: str(value).lower() in ("1", "true", "yes")
+    odoo.http, odoo.tools = http, tools
+    sys.modules.update({"odoo": odoo, "odoo.http": http, "odoo.tools": tools})
+
+
+_install_odoo()
+sys.path.insert(0, ROOT)
+
+
+class Registry:
+    """The registry's default cache and the count of queries run against it"""
+
+    def __init__(self):
+        self.cache = {}
+        self.queries = 0
+
+    def clear_cache(self):
+        self.cache.clear()
+
+
+class IrUiMenu:
+    """Root menus, filtered like ir.ui.menu by the current user's groups and debug mode"""
+
+    def __init__(self, pool, request):
+        self.pool = pool
+        self.request = request
+        self.menus = []
+
+    def create(self, name, action_id=None, groups=()):
+        """Add a root menu; ``groups`` holds group ids, or ``'base.group_no_one'`` for debug-only menus"""
+        self.menus.append({
+            'id': len(self.menus) + 1,
+            'name': name,
+            'action': f'ir.actions.act_window,{action_id}' if action_id else False,
+            'groups': frozenset(groups),
+        })
+        # ir.ui.menu clears the registry cache on create, write and unlink
+        self.pool.clear_cache()
+
+    def _visible(self, menu):
+        if 'base.group_no_one' in menu['groups'] and not self.request.session.debug:
+            return False
+        groups = menu['groups'] - {'base.group_no_one'}
+        return not groups or bool(groups & set(self.request.env.user.groups_id.ids))
+
+    def search(self, domain, order=None):
+        self.pool.queries += 1
+        return Menus(self, [menu for menu in self.menus if self._visible(menu)])
+
+
+class Menus:
+    def __init__(self, model, records):
+        self.model = model
+        self.records = records
+
+    def read(self, fields):
+        self.model.pool.queries += 1
+        return [{'id': menu['id'], **{field: menu[field] for field in fields}} for menu in self.records]
+
+
+class Env(dict):
+    """The environment of a logged-in user: ``env['ir.ui.menu']``, ``env.user``, ``env.lang`` and ``env.company``"""
+
+    def __init__(self, groups):
+        super().__init__()
+        self.user = SimpleNamespace(groups_id=SimpleNamespace(ids=list(groups)))
+        self.lang = 'en_US'
+        self.company = SimpleNamespace(id=1, name='Test Company')
+
+
+@pytest.fixture
+def request_env():
+    """The request proxy of odoo.http, set up for a user of groups 1 and 2 on a fresh registry, outside debug mode"""
+    request = sys.modules["odoo.http"].request
+    request.session = SimpleNamespace(debug='')
+    request.env = Env(groups={1, 2})
+    request.env['ir.ui.menu'] = IrUiMenu(Registry(), request)
+    yield request
+    request.__dict__.clear()
+
+
+@pytest.fixture(params=["main", "main_updated"])
+def controller_module(request):
+    """Each launcher controller, main.py and main_updated.py"""
+    return importlib.import_module(request.param)
@@ -0,0 +1,135 @@
+"""
+Query-count and cache tests for the app launcher controllers
+
+Run with:
+    python3 -m pytest -q tests
+"""
+
+import gzip
+import json
+from types import SimpleNamespace
+
+import main
+
+
+def _add_apps(menus, count, groups=()):
+    for i in range(count):
+        menus.create(f'Launcher Query Test {i}', action_id=i + 1, groups=groups)
+
+
+def _cache_key(request):
+    env = request.env
+    return (
+        env['ir.ui.menu'], frozenset(env.user.groups_id.ids), env.lang, env.company.id,
+        bool(request.session.debug),
+    )
+
+
+def _counting(compute):
+    """Wrap ``compute`` so the tests can tell cache hits from rebuilds"""
+    def wrapper(*args):
+        wrapper.calls += 1
+        return compute(*args)
+    wrapper.calls = 0
+    return wrapper
+
+
+def test_query_count_constant_in_app_count(request_env):
+    """Building the entries costs the same queries for 1 app as for 30 more"""
+    menus = request_env.env['ir.ui.menu']
+    controller = main.AppLauncherHome()
+    _add_apps(menus, 1)
+    controller._get_app_data(menus)
+    queries = menus.pool.queries
+
+    _add_apps(menus, 30)
+    menus.pool.queries = 0
+    apps = controller._get_app_data(menus)
+    assert menus.pool.queries == queries
+    assert len(apps) == 31
+
+
+def test_cached_entries_issue_no_query(request_env, controller_module):
+    """A warm launcher hit is served from the ormcache without rebuilding the entries"""
+    menus, group_ids, lang, company_id, debug = _cache_key(request_env)
+    compute = _counting(main.AppLauncherHome()._get_app_data)
+    _add_apps(menus, 5)
+    for _ in range(2):
+        controller_module._cached_app_data(menus, group_ids, lang, company_id, debug, False, compute)
+        controller_module._cached_app_payload(menus, group_ids, lang, company_id, debug, compute)
+    assert compute.calls == 1
+
+
+def test_debug_mode_has_its_own_entries(request_env, controller_module):
+    """Debug-only menus built for a debug session are not served outside debug mode"""
+    menus, group_ids, lang, company_id, _debug = _cache_key(request_env)
+    compute = main.AppLauncherHome()._get_app_data
+    menus.create('Launcher Visible', action_id=1)
+    menus.create('Launcher Technical', action_id=2, groups=('base.group_no_one',))
+
+    request_env.session.debug = '1'
+    debug_apps = controller_module._cached_app_data(menus, group_ids, lang, company_id, True, False, compute)
+    request_env.session.debug = ''
+    apps = controller_module._cached_app_data(menus, group_ids, lang, company_id, False, False, compute)
+
+    assert [app['name'] for app in debug_apps] == ['Launcher Visible', 'Launcher Technical']
+    assert [app['name'] for app in apps] == ['Launcher Visible']
+    debug_version = controller_module._cached_app_payload(menus, group_ids, lang, company_id, True, compute)[1]
+    version = controller_module._cached_app_payload(menus, group_ids, lang, company_id, False, compute)[1]
+    assert debug_version != version
+
+
+def test_group_sets_have_their_own_entries(request_env, controller_module):
+    """A menu restricted to a group is only listed for group sets that include it"""
+    menus, group_ids, lang, company_id, debug = _cache_key(request_env)
+    compute = main.AppLauncherHome()._get_app_data
+    menus.create('Launcher Restricted', action_id=1, groups=(3,))
+
+    assert controller_module._cached_app_data(menus, group_ids, lang, company_id, debug, False, compute) == ()
+    request_env.env.user.groups_id.ids = [1, 2, 3]
+    apps = controller_module._cached_app_data(menus, group_ids | {3}, lang, company_id, debug, False, compute)
+    assert [app['name'] for app in apps] == ['Launcher Restricted']
+
+
+def test_menu_change_refreshes_cached_entries(request_env, controller_module):
+    """Creating a root menu clears the cached entries and changes the payload version"""
+    menus, group_ids, lang, company_id, debug = _cache_key(request_env)
+    compute = main.AppLauncherHome()._get_app_data
+    before = controller_module._cached_app_data(menus, group_ids, lang, company_id, debug, False, compute)
+    _body, version, _gzipped = controller_module._cached_app_payload(
+        menus, group_ids, lang, company_id, debug, compute,
+    )
+
+    _add_apps(menus, 1)
+    after = controller_module._cached_app_data(menus, group_ids, lang, company_id, debug, False, compute)
+    _body, new_version, _gzipped = controller_module._cached_app_payload(
+        menus, group_ids, lang, company_id, debug, compute,
+    )
+    assert len(after) == len(before) + 1
+    assert new_version != version
+
+
+def test_gzip_and_identity_bodies_have_distinct_etags(request_env):
+    """The JSON route tags each encoding with its own ETag and answers a matching If-None-Match with 304"""
+    _add_apps(request_env.env['ir.ui.menu'], 40)
+    request_env.make_response = lambda body, headers, status=200: SimpleNamespace(
+        body=body, headers=dict(headers), status=status,
+    )
+    controller = main.AppLauncherHome()
+
+    def get(accept_encodings, if_none_match=()):
+        request_env.httprequest = SimpleNamespace(
+            accept_encodings=accept_encodings,
+            if_none_match=SimpleNamespace(contains=lambda etag: etag in if_none_match),
+        )
+        return controller.app_launcher_data()
+
+    plain = get(())
+    gzipped = get(('gzip',))
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(gzipped.body)) == json.loads(plain.body)
+    assert plain.headers['ETag'] != gzipped.headers['ETag']
+
+    etag = gzipped.headers['ETag'].strip('"')
+    assert get(('gzip',), {etag}).status == 304
+    assert get((), {etag}).status == 200